@@ -6,48 +6,172 @@ Author: Mark Heinis
 """
 
 import Domoticz
+from helpers import debug_enabled
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import threading
 import time
-import sys
-import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
 
-# Try to import websocket, with a fallback for Domoticz environment
-websocket_available = False
+# Use a faster JSON library for WebSocket messages and request bodies if one is installed
 try:
-    # Add plugin directory to path to ensure all packages can be found
-    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-    import websocket
-    websocket_available = True
-    Domoticz.Log("Websocket module successfully imported")
+    import orjson as fast_json
 except ImportError:
-    Domoticz.Error("Websocket-client module not found. Install it using: pip3 install websocket-client")
-    websocket_available = False
+    try:
+        import ujson as fast_json
+    except ImportError:
+        fast_json = json
+
+def _dumps(obj):
+    """Serialize obj for the debug log with the fast JSON module, always as str"""
+    text = fast_json.dumps(obj)
+    return text.decode() if isinstance(text, bytes) else text
+
+# The websocket module is imported on first use, see _import_websocket()
+websocket = None
+websocket_available = None  # None until the import has been attempted
+
+def _import_websocket():
+    """Import the websocket-client module on first use, return True if available"""
+    global websocket, websocket_available
+    if websocket_available is None:
+        # Packages bundled in the plugin directory are found without touching
+        # sys.path: Domoticz already puts it there, which is how this module
+        # itself was imported
+        try:
+            import websocket as websocket_module
+            websocket = websocket_module
+            websocket_available = True
+            Domoticz.Debug("Websocket module successfully imported")
+        except ImportError:
+            Domoticz.Error("Websocket-client module not found. Install it using: pip3 install websocket-client")
+            websocket_available = False
+    return websocket_available
+
+def _deep_update(dst, src):
+    """Merge src into dst in place, keeping nested keys that src does not contain"""
+    for key, value in src.items():
+        current = dst.get(key)
+        if isinstance(current, dict) and isinstance(value, dict):
+            _deep_update(current, value)
+        elif isinstance(current, list) and isinstance(value, list) and len(current) == len(value):
+            for i, item in enumerate(value):
+                if isinstance(current[i], dict) and isinstance(item, dict):
+                    _deep_update(current[i], item)
+                else:
+                    current[i] = item
+        else:
+            dst[key] = value
+    return dst
+
+def _make_setter(url_attr, label, doc):
+    """Build an EVCCApi setter that POSTs to the URL template stored in url_attr
+    
+    The last argument is the new value; a leading argument is the loadpoint ID.
+    """
+    def setter(self, *args):
+        self._state_cache = None  # Make the next read fetch fresh state
+        status = self._post(getattr(self, url_attr).format(*args))
+        if status is None:
+            return False  # _post has logged the error
+        if status >= 400:
+            Domoticz.Error(f"Failed to change {label}: {status}")
+            return False
+        target = f" for loadpoint {args[0]}" if len(args) > 1 else ""
+        Domoticz.Log(f"Successfully changed {label} to {args[-1]}{target}")
+        return True
+    setter.__doc__ = doc
+    return setter
+
+# WebSocket payloads that carry no state
+EMPTY_FRAMES = ("{}", b"{}", "ping", "pong")
+
+# Complete state updates typically include multiple of these keys
+COMPLETE_MARKERS = ("pvPower", "grid", "homePower", "loadpoints.0")
+
+def _is_complete_state(data):
+    """Return True if a decoded frame carries at least two complete-state markers
+    
+    Probes the frame for the markers rather than intersecting with it, so the
+    cost does not grow with the size of the frame and stops at the second hit.
+    """
+    found = 0
+    for key in COMPLETE_MARKERS:
+        if key in data:
+            found += 1
+            if found >= 2:
+                return True
+    return False
 
 class EVCCApi:
     """Class for handling EVCC API communications"""
     
     def __init__(self, address, port, password=None):
         """Initialize API client with connection settings"""
+        # Validate the host once so every URL built from it is well-formed;
+        # accept "host", "http://host" and "host/" in the Address setting
+        address = str(address).strip().rstrip("/")
+        if "://" in address:
+            address = address.split("://", 1)[1]
+        port = str(port).strip()
         self.base_url = f"http://{address}:{port}/api"
         self.ws_url = f"ws://{address}:{port}/ws"
         self.password = password
-        self.auth_cookie = None
+        
+        # API URLs, built once
+        self._url_login = self.base_url + "/auth/login"
+        self._url_logout = self.base_url + "/auth/logout"
+        self._url_state = self.base_url + "/state"
+        self._url_mode = self.base_url + "/loadpoints/{}/mode/{}"
+        self._url_phases = self.base_url + "/loadpoints/{}/phases/{}"
+        self._url_min_soc = self.base_url + "/loadpoints/{}/minsoc/{}"
+        self._url_target_soc = self.base_url + "/loadpoints/{}/limitsoc/{}"
+        self._url_battery_mode = self.base_url + "/batterymode/{}"
+        self._url_device_status = self.base_url + "/config/devices/{}/{}/status"
+        
+        # Shared HTTP session: keeps connections alive between calls and carries
+        # the auth cookie set by /auth/login automatically
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=10,
+                              max_retries=Retry(total=2, backoff_factor=0.3,
+                                                status_forcelist=[502, 503, 504]))
+        self.session.mount("http://", adapter)
+        
+        self._worker_pool = None  # Created on first use, see _pool
+        
+        self._ws_headers = []  # WebSocket handshake headers, set on login
         self.ws = None
         self.ws_connected = False
-        self.ws_last_data = {}  # Change to dict for better merging
-        self.ws_temp_data = {}  # Temporary storage for partial updates
+        self._ws_ready = threading.Event()  # Set once the WebSocket handshake completes
+        self._ws_has_state = threading.Event()  # Set once a complete state has been received
+        self._ws_stop = threading.Event()  # Set to make the WebSocket thread exit
+        self._ws_closed = threading.Event()  # Set once an open connection has been torn down
+        self._ws_closed.set()
+        self._ws_lock = threading.Lock()  # Guards ws_last_complete/ws_pending and close bookkeeping between threads
+        self.ws_last_complete = {}  # Last complete state, see ws_last_data
+        self.ws_pending = deque()  # Partial updates received since the state was last read
         self.ws_error = None
-        self.ws_reconnect_interval = 60  # Reconnect every 60 seconds if connection lost
+        self.ws_reconnect_interval = 60  # Maximum seconds between reconnect attempts if connection lost
+        self.ws_reconnect_delay = 1.0  # Current reconnect delay, doubled after every failed attempt
         self.ws_thread = None
         self.ws_last_log_time = 0
         self.ws_log_interval = 60  # Log only once per minute to avoid log spam
         self.ws_keep_connection = False  # Whether to keep WebSocket connection open
         self.last_complete_update = 0
         self.min_complete_update_interval = 5  # Minimum seconds between complete updates
-        self.update_in_progress = False  # Flag to prevent simultaneous update operations
         self.last_data_update = 0  # Track when the ws_last_data was last updated
+        self.ws_last_update_ts = 0  # Monotonic time the last WebSocket message was received
+        self.ws_stale_after = 20  # Seconds without messages before probing REST (2x heartbeat)
+        self._state_cache = None  # Last state returned by get_state
+        self._state_cache_ts = 0.0
+        self._state_ttl = 0.5  # Seconds a get_state result is reused
+        self._rest_state = None  # Last state parsed from REST /state
+        self._state_etag = None  # Validators for conditional REST /state requests
+        self._state_lastmod = None
         
     def login(self):
         """Login to EVCC API if password is provided"""
@@ -56,18 +180,19 @@ class EVCCApi:
             
         Domoticz.Debug("Logging in to EVCC API")
         try:
-            response = requests.post(
-                url=f"{self.base_url}/auth/login", 
-                json={"password": self.password}
+            response = self.session.post(
+                url=self._url_login, 
+                data=fast_json.dumps({"password": self.password}),
+                headers={"Content-Type": "application/json"}
             )
             
-            if response.status_code == 200:
-                cookies = response.cookies
-                for cookie in cookies:
-                    if cookie.name == "auth":
-                        self.auth_cookie = cookie
-                        Domoticz.Log("Successfully logged in to EVCC API")
-                        return True
+            if response.ok:
+                # The session cookie jar keeps the auth cookie for later requests
+                if "auth" in self.session.cookies:
+                    # Build the WebSocket cookie header once instead of on every connect
+                    self._ws_headers = [f"Cookie: auth={self.session.cookies.get('auth')}"]
+                    Domoticz.Log("Successfully logged in to EVCC API")
+                    return True
                         
                 Domoticz.Error("No auth cookie received after login")
                 return False
@@ -80,149 +205,201 @@ class EVCCApi:
             return False
             
     def logout(self):
-        """Logout from EVCC API"""
-        # Close WebSocket connection if it exists
+        """Logout from EVCC API and release all connections and threads"""
+        # Close WebSocket connection if it exists and wait briefly for its thread
         self.close_websocket()
+        if self.ws_thread and self.ws_thread.is_alive() and self.ws_thread is not threading.current_thread():
+            self.ws_thread.join(timeout=2)
+        self.ws_thread = None
         
-        if self.auth_cookie is not None:
-            try:
-                requests.post(f"{self.base_url}/auth/logout")
-                self.auth_cookie = None
-                return True
-            except Exception as e:
-                Domoticz.Error(f"Error logging out from EVCC API: {str(e)}")
-                return False
-        return True
+        try:
+            if "auth" in self.session.cookies:
+                self.session.post(self._url_logout)
+                self.session.cookies.clear()
+                self._ws_headers = []
+            return True
+        except Exception as e:
+            Domoticz.Error(f"Error logging out from EVCC API: {str(e)}")
+            return False
+        finally:
+            # Release pooled connections and worker threads; both are recreated
+            # on demand if the plugin logs in again
+            self.session.close()
+            if self._worker_pool is not None:
+                self._worker_pool.shutdown(wait=False)
+                self._worker_pool = None
+    
+    def wait_for_state(self, timeout):
+        """Wait until the WebSocket has delivered a complete state
         
-    def get_cookies(self):
-        """Get authentication cookies if available"""
-        if self.auth_cookie:
-            return {"auth": self.auth_cookie.value}
-        return {}
+        Args:
+            timeout: Maximum number of seconds to wait
+            
+        Returns:
+            True if a complete state is available
+        """
+        return self._ws_has_state.wait(timeout)
+    
+    @property
+    def _pool(self):
+        """Worker pool used to send several setter or status requests in parallel"""
+        if self._worker_pool is None:
+            self._worker_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="EVCCApi:worker")
+        return self._worker_pool
+    
+    @property
+    def ws_running(self):
+        """True while the WebSocket thread is connected or reconnecting"""
+        return self.ws is not None and self.ws_thread is not None and self.ws_thread.is_alive()
+    
+    @property
+    def ws_last_data(self):
+        """Current WebSocket state
+        
+        Partial updates are buffered by the WebSocket thread and only merged into
+        the last complete state here, when somebody actually reads it.
+        """
+        merged = False
+        with self._ws_lock:
+            state = self.ws_last_complete
+            if self.ws_pending and state:
+                # Merge in place, oldest frame first: the WebSocket thread replaces
+                # ws_last_complete rather than modifying it, so this read is its
+                # only writer
+                pending = self.ws_pending
+                while pending:
+                    _deep_update(state, pending.popleft())
+                self.last_data_update = time.monotonic()
+                merged = True
+                
+        # Serialize for the log outside the lock so the WebSocket thread is not held up
+        if merged and debug_enabled() and (self.last_data_update - self.ws_last_log_time) > self.ws_log_interval:
+            self.ws_last_log_time = self.last_data_update
+            # Log merged updates as a single line
+            Domoticz.Debug(f"Merged updates: {_dumps(state)}")
+        return state
+            
+    @ws_last_data.setter
+    def ws_last_data(self, value):
+        with self._ws_lock:
+            self.ws_last_complete = value
     
     def connect_websocket(self, keep_connection=True):
         """Connect to EVCC WebSocket for real-time data
         
+        With keep_connection the connection is established in the background; this
+        returns as soon as the WebSocket thread is started. ws_connected is set once
+        the handshake completes.
+        
+        Without keep_connection a single complete state is read synchronously and
+        stored in ws_last_data; no thread is started.
+        
         Args:
             keep_connection: If True, keep connection open. If False, close after receiving full state.
+            
+        Returns:
+            True if the connection attempt was started, or the state was read
         """
-        if not websocket_available:
-            Domoticz.Error("Websocket module not available. Install it using: pip3 install websocket-client")
+        if not _import_websocket():
             return False
             
-        # Ensure any existing connection is closed first
+        # Ensure any existing connection is closed first; this returns once
+        # on_close has confirmed the socket is torn down
         self.close_websocket()
-        # Small delay to ensure socket is fully closed
-        time.sleep(0.5)
+        
+        if not keep_connection:
+            return self._fetch_websocket_snapshot()
             
-        try:
-            # Create WebSocket connection
-            headers = {}
-            cookies = self.get_cookies()
-            if cookies:
-                cookie_str = "; ".join([f"{k}={v}" for k, v in cookies.items()])
-                headers["Cookie"] = cookie_str
+        self._ws_stop.clear()
             
+        try:
             # Reset state flags
             self.ws_connected = False
-            self.received_complete_state = False
-            self.ws_last_data = {}
-            self.ws_temp_data = {}
-            self.ws_keep_connection = keep_connection
+            self._ws_ready.clear()
+            self._ws_has_state.clear()
+            self._reset_ws_state()
+            self.ws_keep_connection = True
             
             # Define WebSocket callbacks
             def on_message(ws, message):
+                if ws is not self.ws:
+                    return  # Replaced by a newer connection
+                # Skip keepalive/empty frames and anything that is not a JSON object
+                # before paying for a decode
+                if not message or message in EMPTY_FRAMES or message[:1] not in ("{", b"{"):
+                    return
+                    
                 try:
                     # Parse the JSON message
-                    data = json.loads(message)
-                    current_time = time.time()
+                    data = fast_json.loads(message)
+                    # One monotonic clock read per frame serves the liveness timestamp
+                    # and all merge/log throttles below
+                    current_time = time.monotonic()
+                    self.ws_last_update_ts = current_time
                     
-                    # Determine if this is a complete state update
-                    # Complete updates typically include multiple key indicators
-                    complete_state_indicators = {"pvPower", "grid", "homePower", "loadpoints.0"}
-                    is_complete_state = False
-                    
-                    # Avoid updating data while another update is in progress
-                    if self.update_in_progress:
-                        Domoticz.Debug("Update in progress, deferring WebSocket message processing")
+                    if not isinstance(data, dict):
                         return
-                    
-                    # Set update in progress flag
-                    self.update_in_progress = True
-                    
-                    try:
-                        if isinstance(data, dict):
-                            present_indicators = complete_state_indicators.intersection(data.keys())
-                            is_complete_state = len(present_indicators) >= 2  # Consider complete if 2+ indicators present
-                            
-                            if is_complete_state and (current_time - self.last_complete_update) >= self.min_complete_update_interval:
-                                self.last_complete_update = current_time
-                                self.ws_last_data = data.copy()  # Store complete state
-                                self.ws_temp_data = {}  # Clear temporary data
-                                self.received_complete_state = True
-                                self.last_data_update = current_time
-                                
-                                # Log complete state as a single line
-                                Domoticz.Debug(f"Complete state: {json.dumps(self.ws_last_data)}")
-                                
-                                # Handle one-time connection mode
-                                if not self.ws_keep_connection:
-                                    Domoticz.Log("Received complete state, closing one-time WebSocket connection")
-                                    threading.Timer(2.0, self.close_websocket).start()
-                            else:
-                                # Handle partial update
-                                # Store in temporary buffer first
-                                self.ws_temp_data.update(data)
-                                
-                                # Only merge temp data periodically to avoid excessive updates
-                                if self.ws_last_data and (current_time - self.last_data_update) >= 1:
-                                    # Merge temporary data into last complete state
-                                    merged_data = self.ws_last_data.copy()
-                                    merged_data.update(self.ws_temp_data)
-                                    self.ws_last_data = merged_data
-                                    self.ws_temp_data = {}  # Clear temporary buffer
-                                    self.last_data_update = current_time
-                                    
-                                    if (current_time - self.ws_last_log_time) > self.ws_log_interval:
-                                        self.ws_last_log_time = current_time
-                                        # Log merged updates as a single line
-                                        Domoticz.Debug(f"Merged updates: {json.dumps(merged_data)}")
-                    finally:
-                        # Always clear update in progress flag
-                        self.update_in_progress = False
+                    # Messages are only handled on this thread; _ws_lock covers the
+                    # handoff to readers of ws_last_data
+                    if _is_complete_state(data) and (current_time - self.last_complete_update) >= self.min_complete_update_interval:
+                        # Serialize for the log before the frame is handed over: once
+                        # stored, ws_last_data merges partial updates into it in place
+                        to_log = _dumps(data) if debug_enabled() else None
+                        self.last_complete_update = current_time
+                        with self._ws_lock:
+                            self.ws_last_complete = data  # Freshly decoded, nothing else holds it
+                            self.ws_pending.clear()  # Superseded by the complete state
+                        self._ws_has_state.set()
+                        self.last_data_update = current_time
+                        # Log complete state as a single line, outside the lock
+                        if to_log is not None:
+                            Domoticz.Debug(f"Complete state: {to_log}")
+                    else:
+                        # Handle partial update
+                        # Only queue it here; ws_last_data merges the queued frames
+                        # in one batch when the state is read
+                        with self._ws_lock:
+                            self.ws_pending.append(data)
                     
                 except Exception as e:
-                    self.update_in_progress = False  # Make sure flag is cleared
                     Domoticz.Error(f"Error parsing WebSocket data: {str(e)}\nRaw message: {message}")
             
+            # Callbacks of a connection replaced by a forced reconnect can still
+            # fire; they must not touch the state of the new connection
             def on_error(ws, error):
+                if ws is not self.ws:
+                    return
                 self.ws_error = str(error)
                 Domoticz.Error(f"WebSocket error: {self.ws_error}")
-                self.ws_connected = False
-                self.ws = None  # Clear the WebSocket instance on error
+                self._mark_ws_closed()
                 
             def on_close(ws, close_status_code, close_msg):
-                self.ws_connected = False
+                if ws is not self.ws:
+                    return
                 if close_status_code or close_msg:
-                    Domoticz.Log(f"WebSocket connection closed: {close_status_code} - {close_msg}")
+                    self._mark_ws_closed(f"WebSocket connection closed: {close_status_code} - {close_msg}")
                 else:
-                    Domoticz.Log("WebSocket connection closed")
-                self.ws = None  # Clear the WebSocket instance on close
+                    self._mark_ws_closed()
                 
             def on_open(ws):
+                if ws is not self.ws:
+                    return
                 self.ws_connected = True
+                self._ws_ready.set()
+                self._ws_closed.clear()
                 self.ws_error = None
-                self.ws_last_data = {}  # Reset data on new connection
-                self.ws_temp_data = {}  # Reset temporary data
+                self._ws_has_state.clear()
+                self._reset_ws_state()  # Drop data and updates from the previous connection
                 self.last_complete_update = 0  # Reset update timestamp
                 self.last_data_update = 0
-                self.update_in_progress = False
+                self.ws_last_update_ts = 0
+                self.ws_reconnect_delay = 1.0  # Reset backoff on successful connection
                 Domoticz.Log("WebSocket connection established")
             
             # Create WebSocket instance
             ws = websocket.WebSocketApp(
                 self.ws_url,
-                header=headers,
+                header=self._ws_headers,
                 on_open=on_open,
                 on_message=on_message,
                 on_error=on_error,
@@ -234,310 +411,301 @@ class EVCCApi:
             
             # Start WebSocket in a separate thread
             def run_websocket():
+                # Owns reconnects for this connection: run until close_websocket()
+                # stops it or a newer connection replaces this one
                 while True:
                     try:
-                        # Check if WebSocket instance is still valid
-                        if not self.ws:
-                            Domoticz.Log("WebSocket instance no longer exists")
-                            break
-                            
-                        self.ws.run_forever()
-                        
-                        # Exit conditions
-                        if not self.ws_keep_connection:
-                            Domoticz.Log("WebSocket connection not being kept alive")
-                            break
-                        if not self.ws:
-                            Domoticz.Log("WebSocket instance has been cleared")
-                            break
-                            
-                        # If we reach here, connection was lost but we want to keep it
-                        if self.ws_keep_connection:
-                            Domoticz.Log("WebSocket connection lost, waiting before reconnect attempt...")
-                            time.sleep(5)  # Wait before reconnecting
-                            
+                        # Pings keep idle connections from being dropped by NAT/proxies.
+                        # UTF-8 validation is skipped: it runs in pure Python per frame
+                        # and the JSON decoder rejects malformed text anyway.
+                        ws.run_forever(ping_interval=30, ping_timeout=10,
+                                       skip_utf8_validation=True)
                     except Exception as e:
                         Domoticz.Error(f"WebSocket thread error: {str(e)}")
-                        if not self.ws_keep_connection:
-                            break
-                        time.sleep(5)  # Wait before retry
+                        
+                    if self._ws_stop.is_set() or self.ws is not ws:
+                        break
+                        
+                    Domoticz.Log(f"WebSocket connection lost, waiting {self.ws_reconnect_delay:.0f}s before reconnect attempt...")
+                    if self._reconnect_backoff():
+                        break
                         
                 Domoticz.Log("WebSocket thread ending")
-                # Ensure WebSocket instance is cleared
-                self.ws = None
-                self.ws_connected = False
-                self.update_in_progress = False
+                if self.ws is ws:
+                    self._mark_ws_closed()
             
-            # Start a new thread only if we don't already have one
-            if not self.ws_thread or not self.ws_thread.is_alive():
-                self.ws_thread = threading.Thread(target=run_websocket)
-                self.ws_thread.daemon = True
-                self.ws_thread.start()
+            # Any previous thread exits on its own once it sees it was replaced
+            self.ws_thread = threading.Thread(target=run_websocket, name="EVCCApi:ws", daemon=True)
+            self.ws_thread.start()
             
-            # Wait for connection to establish
-            timeout = 10
-            start_time = time.time()
-            while not self.ws_connected and (time.time() - start_time) < timeout:
-                time.sleep(0.1)
+            return True
             
-            return self.ws_connected
+        except Exception as e:
+            Domoticz.Error(f"Error connecting to WebSocket: {str(e)}")
+            return False
+    
+    def _fetch_websocket_snapshot(self, timeout=10):
+        """Read one complete state over a short-lived WebSocket connection
+        
+        Args:
+            timeout: Seconds to wait for the connection and the complete state
             
+        Returns:
+            True if a complete state was received and stored in ws_last_data
+        """
+        try:
+            ws = websocket.create_connection(self.ws_url, header=self._ws_headers, timeout=timeout,
+                                             skip_utf8_validation=True)
         except Exception as e:
             Domoticz.Error(f"Error connecting to WebSocket: {str(e)}")
             return False
+            
+        try:
+            deadline = time.monotonic() + timeout
+            while time.monotonic() < deadline:
+                message = ws.recv()
+                if not message or message in EMPTY_FRAMES or message[:1] not in ("{", b"{"):
+                    continue
+                data = fast_json.loads(message)
+                if isinstance(data, dict) and _is_complete_state(data):
+                    now = time.monotonic()
+                    with self._ws_lock:
+                        self.ws_last_complete = data
+                        self.ws_pending.clear()
+                    self._ws_has_state.set()
+                    self.last_complete_update = now
+                    self.last_data_update = now
+                    self.ws_last_update_ts = now
+                    Domoticz.Log("Received complete state, closing one-time WebSocket connection")
+                    return True
+            Domoticz.Error("No complete state received over WebSocket")
+        except Exception as e:
+            Domoticz.Error(f"Error reading WebSocket state: {str(e)}")
+        finally:
+            ws.close()
+        return False
+    
+    def _reconnect_backoff(self):
+        """Wait before the next reconnect attempt, using exponential backoff with jitter
+        
+        Returns:
+            True if close_websocket() was called while waiting
+        """
+        delay = self.ws_reconnect_delay
+        self.ws_reconnect_delay = min(delay * 2, self.ws_reconnect_interval)
+        return self._ws_stop.wait(delay + random.uniform(0, delay * 0.3))
+    
+    def _reset_ws_state(self):
+        """Drop the WebSocket state and any queued partial updates
+        
+        Done under the lock: ws_last_data drains ws_pending on the Domoticz thread.
+        """
+        with self._ws_lock:
+            self.ws_last_complete = {}
+            self.ws_pending.clear()
+    
+    def _mark_ws_closed(self, message="WebSocket connection closed"):
+        """Clear the connection state, logging message only for the first caller
+        
+        Called from on_error/on_close in the WebSocket thread and from
+        close_websocket(), which all fire for the same close.
+        """
+        with self._ws_lock:
+            was_connected = self.ws_connected
+            self.ws_connected = False
+            self._ws_ready.clear()
+        self._ws_closed.set()
+        if was_connected:
+            Domoticz.Log(message)
     
     def close_websocket(self):
-        """Close WebSocket connection"""
-        if self.ws:
+        """Close WebSocket connection and stop the reconnect loop"""
+        # Stop the reconnect loop before closing
+        self._ws_stop.set()
+        self.ws_keep_connection = False
+        self._ws_has_state.clear()  # Nothing will keep the last state up to date
+        ws = self.ws
+        if ws:
             try:
-                # Set flags first to prevent reconnection attempts
-                self.ws_connected = False
-                self.ws_keep_connection = False
-                
-                # Store reference to current WebSocket
-                ws = self.ws
-                
-                # Check if connection is currently open
-                try:
-                    if hasattr(ws, 'sock') and ws.sock:
-                        ws.close()
-                        # Wait for close to complete
-                        start_time = time.time()
-                        while hasattr(self.ws, 'sock') and self.ws.sock and time.time() - start_time < 5:
-                            time.sleep(0.1)
-                except:
-                    pass  # If any error occurs during close, continue to clearing
-                
-                # Clear the websocket instance
-                self.ws = None
-                self.update_in_progress = False
-                Domoticz.Log("WebSocket connection closed")
-                
+                # Also stops a run_forever() that is still connecting
+                ws.close()
+                # Wait for on_close to confirm an open socket is torn down
+                self._ws_closed.wait(timeout=5)
             except Exception as e:
-                self.update_in_progress = False
                 Domoticz.Error(f"Error closing WebSocket: {str(e)}")
+            self._mark_ws_closed()
+            self.ws = None
+        # Nothing reads the queue once the connection is stopped
+        self._reset_ws_state()
     
-    def get_state(self, use_websocket=True, keep_connection=False):
+    def get_state(self, use_websocket=True):
         """Get the current state of the EVCC system
         
+        Once the WebSocket is connected, or a one-time WebSocket state has been
+        read, it is the source of truth and this is a plain dict read. REST is
+        only used to bootstrap before the first WebSocket state arrives, or as a
+        probe when the WebSocket has gone quiet.
+        
         Args:
-            use_websocket: Whether to try WebSocket first
-            keep_connection: If using WebSocket, whether to keep the connection open
-                             after getting data (uses more resources but faster updates)
+            use_websocket: Whether to use WebSocket data when available; False
+                always returns the nested REST state
         """
-        # Check if we already have WebSocket data
-        if self.ws_connected and self.ws_last_data:
-            Domoticz.Debug(f"Using cached WebSocket data: {json.dumps(self.ws_last_data)}")
-            return self.ws_last_data
-        
-        # If WebSocket requested and available, try to use it
-        if use_websocket and websocket_available:
-            if not self.ws_connected:
-                # Connect, specifying whether to keep connection open
-                self.connect_websocket(keep_connection=keep_connection)
-                
-                # If connection successful and we have data...
-                if self.ws_connected and self.ws_last_data:
-                    Domoticz.Debug(f"Using new WebSocket data: {json.dumps(self.ws_last_data)}")
-                    return self.ws_last_data
-                
-                # If one-time connection closed but we got data...
-                if not self.ws_connected and not keep_connection and self.ws_last_data:
-                    Domoticz.Debug(f"Using one-time WebSocket data: {json.dumps(self.ws_last_data)}")
-                    return self.ws_last_data
+        # Coalesce burst reads within the same heartbeat; REST-mode callers only
+        # reuse a cached REST state, WebSocket data has a different shape
+        now = time.monotonic()
+        if (self._state_cache is not None and now - self._state_cache_ts < self._state_ttl
+                and (use_websocket or self._state_cache is self._rest_state)):
+            return self._state_cache
+            
+        # A one-time snapshot has no open connection; it is used while it is fresh
+        ws_usable = self._ws_ready.is_set() or (not self.ws_keep_connection and self._ws_has_state.is_set())
+        ws_data = self.ws_last_data if use_websocket and ws_usable else None
+        if ws_data:
+            if now - self.ws_last_update_ts <= self.ws_stale_after:
+                self._state_cache = ws_data
+                self._state_cache_ts = now
+                return ws_data
+            Domoticz.Debug("No WebSocket messages received recently, probing REST API")
         
-        # Fall back to REST API if WebSocket not available or failed
+        # Fall back to REST API if WebSocket not available, not ready yet or stale
         try:
-            cookies = self.get_cookies()
-            
-            response = requests.get(f"{self.base_url}/state", cookies=cookies)
-            
-            if response.status_code != 200:
-                Domoticz.Error(f"Failed to get EVCC state: {response.status_code}")
-                return None
-
-            data = response.json()
+            # Let the server answer 304 if the state has not changed
+            headers = {}
+            if self._rest_state is not None:
+                if self._state_etag:
+                    headers["If-None-Match"] = self._state_etag
+                if self._state_lastmod:
+                    headers["If-Modified-Since"] = self._state_lastmod
+                    
+            with self.session.get(self._url_state, headers=headers) as response:
+                if response.status_code == 304:
+                    self._state_cache = self._rest_state
+                    self._state_cache_ts = now
+                    return self._rest_state
+                    
+                # Only decode the body on success
+                if not response.ok:
+                    Domoticz.Error(f"Failed to get EVCC state: {response.status_code}")
+                    return None
+                # Decode the raw bytes directly; response.json() first builds a
+                # decoded copy of the whole document as text
+                data = fast_json.loads(response.content)
+                self._state_etag = response.headers.get("ETag")
+                self._state_lastmod = response.headers.get("Last-Modified")
             
             # Log the REST API response as a single line
-            Domoticz.Debug(f"REST API response: {json.dumps(data)}")
+            if debug_enabled():
+                Domoticz.Debug(f"REST API response: {_dumps(data)}")
             
             # Check if this is data or result.data
             if "result" in data:
-                return data["result"]
-            else:
-                return data
+                data = data["result"]
+                
+            self._rest_state = data
+            self._state_cache = data
+            self._state_cache_ts = now
+            return data
                 
         except Exception as e:
             Domoticz.Error(f"Error getting EVCC state: {str(e)}")
             return None
             
-    def set_loadpoint_mode(self, loadpoint_id, mode):
-        """Set charging mode for a loadpoint"""
-        try:
-            cookies = self.get_cookies()
-            response = requests.post(
-                f"{self.base_url}/loadpoints/{loadpoint_id}/mode/{mode}", 
-                cookies=cookies
-            )
-            if response.status_code == 200:
-                Domoticz.Log(f"Successfully changed charging mode to {mode} for loadpoint {loadpoint_id}")
-                return True
-            else:
-                Domoticz.Error(f"Failed to change charging mode: {response.status_code}")
-                return False
-        except Exception as e:
-            Domoticz.Error(f"Error setting loadpoint mode: {str(e)}")
-            return False
+    # Simple setters, one POST each: method(args...) -> True on success
+    set_loadpoint_mode = _make_setter("_url_mode", "charging mode",
+                                      "Set charging mode for a loadpoint (loadpoint_id, mode)")
+    set_loadpoint_phases = _make_setter("_url_phases", "charging phases",
+                                        "Set number of phases for a loadpoint (loadpoint_id, phases)")
+    set_loadpoint_min_soc = _make_setter("_url_min_soc", "min SoC",
+                                         "Set minimum SoC for a loadpoint (loadpoint_id, min_soc)")
+    set_loadpoint_target_soc = _make_setter("_url_target_soc", "target SoC",
+                                            "Set target SoC for a loadpoint (loadpoint_id, target_soc)")
+    set_battery_mode = _make_setter("_url_battery_mode", "battery mode",
+                                    "Set battery operating mode (mode)")
             
-    def set_loadpoint_phases(self, loadpoint_id, phases):
-        """Set number of phases for a loadpoint"""
+    def _post(self, url):
+        """POST to a URL and return the status code, None on error"""
         try:
-            cookies = self.get_cookies()
-            response = requests.post(
-                f"{self.base_url}/loadpoints/{loadpoint_id}/phases/{phases}", 
-                cookies=cookies
-            )
-            if response.status_code == 200:
-                Domoticz.Log(f"Successfully changed charging phases to {phases} for loadpoint {loadpoint_id}")
-                return True
-            else:
-                Domoticz.Error(f"Failed to change charging phases: {response.status_code}")
-                return False
+            with self.session.post(url) as response:
+                return response.status_code
         except Exception as e:
-            Domoticz.Error(f"Error setting loadpoint phases: {str(e)}")
-            return False
+            Domoticz.Error(f"Error posting to {url}: {str(e)}")
+            return None
             
-    def set_loadpoint_min_soc(self, loadpoint_id, min_soc):
-        """Set minimum SoC for a loadpoint"""
-        try:
-            cookies = self.get_cookies()
-            response = requests.post(
-                f"{self.base_url}/loadpoints/{loadpoint_id}/minsoc/{min_soc}", 
-                cookies=cookies
-            )
-            if response.status_code == 200:
-                Domoticz.Log(f"Successfully changed min SoC to {min_soc} for loadpoint {loadpoint_id}")
-                return True
-            else:
-                Domoticz.Error(f"Failed to change min SoC: {response.status_code}")
-                return False
-        except Exception as e:
-            Domoticz.Error(f"Error setting min SoC: {str(e)}")
-            return False
+    def set_loadpoint_bulk(self, loadpoint_id, mode=None, phases=None, minsoc=None, limitsoc=None):
+        """Set several loadpoint settings at once, sending the requests in parallel
+        
+        Args:
+            loadpoint_id: EVCC loadpoint ID
+            mode, phases, minsoc, limitsoc: Values to set, None to leave unchanged
+        
+        Returns:
+            True if all requests succeeded
+        """
+        fields = (("mode", self._url_mode, mode),
+                  ("phases", self._url_phases, phases),
+                  ("minsoc", self._url_min_soc, minsoc),
+                  ("limitsoc", self._url_target_soc, limitsoc))
+        requested = [(f"{name}={value}", template.format(loadpoint_id, value))
+                     for name, template, value in fields if value is not None]
+        if not requested:
+            return True
             
-    def set_loadpoint_target_soc(self, loadpoint_id, target_soc):
-        """Set target SoC for a loadpoint"""
-        try:
-            cookies = self.get_cookies()
-            response = requests.post(
-                f"{self.base_url}/loadpoints/{loadpoint_id}/limitsoc/{target_soc}", 
-                cookies=cookies
-            )
-            if response.status_code == 200:
-                Domoticz.Log(f"Successfully changed target SoC to {target_soc} for loadpoint {loadpoint_id}")
-                return True
-            else:
-                Domoticz.Error(f"Failed to change target SoC: {response.status_code}")
-                return False
-        except Exception as e:
-            Domoticz.Error(f"Error setting target SoC: {str(e)}")
+        self._state_cache = None  # Make the next read fetch fresh state
+        statuses = self._pool.map(self._post, [url for _, url in requested])
+        failed = [change for (change, _), status in zip(requested, statuses)
+                  if status is None or status >= 400]
+        if failed:
+            Domoticz.Error(f"Failed to update loadpoint {loadpoint_id}: {', '.join(failed)}")
             return False
             
-    def set_battery_mode(self, mode):
-        """Set battery operating mode"""
-        try:
-            cookies = self.get_cookies()
-            response = requests.post(
-                f"{self.base_url}/batterymode/{mode}", 
-                cookies=cookies
-            )
-            if response.status_code == 200:
-                Domoticz.Log(f"Successfully changed battery mode to {mode}")
-                return True
-            else:
-                Domoticz.Error(f"Failed to change battery mode: {response.status_code}")
-                return False
-        except Exception as e:
-            Domoticz.Error(f"Error setting battery mode: {str(e)}")
-            return False
-
-    def get_vehicle_status(self, vehicle_id):
-        """Get detailed status for a specific vehicle"""
-        try:
-            cookies = self.get_cookies()
-            response = requests.get(
-                f"{self.base_url}/config/devices/vehicle/{vehicle_id}/status",
-                cookies=cookies
-            )
+        Domoticz.Log(f"Successfully updated loadpoint {loadpoint_id}: {', '.join(change for change, _ in requested)}")
+        return True
             
-            if response.status_code != 200:
-                Domoticz.Error(f"Failed to get vehicle status: {response.status_code}")
-                return None
+    def get_device_statuses(self, device_type, device_ids):
+        """Get detailed status for several devices of one type in parallel
+        
+        Args:
+            device_type: "vehicle", "meter" or "charger"
+            device_ids: EVCC device IDs
+        
+        Returns:
+            Dict of device ID -> status dict (None if the request failed)
+        """
+        device_ids = list(device_ids)
+        statuses = self._pool.map(self._get_device_status, [device_type] * len(device_ids), device_ids)
+        return dict(zip(device_ids, statuses))
 
-            data = response.json()
+    def _get_device_status(self, device_type, device_id):
+        """Get detailed status for a device as a dict of field -> value
+        
+        Args:
+            device_type: "vehicle", "meter" or "charger"
+            device_id: EVCC device ID
+        """
+        try:
+            with self.session.get(self._url_device_status.format(device_type, device_id)) as response:
+                if not response.ok:
+                    Domoticz.Error(f"Failed to get {device_type} status: {response.status_code}")
+                    return None
+                data = fast_json.loads(response.content)
             if "result" in data:
-                # Extract values from result
-                result = {}
-                for key, item in data["result"].items():
-                    if isinstance(item, dict) and "value" in item:
-                        result[key] = item["value"]
-                return result
+                # Each field is reported as {"value": ...}
+                return {key: item["value"] for key, item in data["result"].items()
+                        if type(item) is dict and "value" in item}
             return None
                 
         except Exception as e:
-            Domoticz.Error(f"Error getting vehicle status: {str(e)}")
+            Domoticz.Error(f"Error getting {device_type} status: {str(e)}")
             return None
 
+    def get_vehicle_status(self, vehicle_id):
+        """Get detailed status for a specific vehicle"""
+        return self._get_device_status("vehicle", vehicle_id)
+
     def get_meter_status(self, meter_id):
         """Get detailed status for a specific meter"""
-        try:
-            cookies = self.get_cookies()
-            response = requests.get(
-                f"{self.base_url}/config/devices/meter/{meter_id}/status",
-                cookies=cookies
-            )
-            
-            if response.status_code != 200:
-                Domoticz.Error(f"Failed to get meter status: {response.status_code}")
-                return None
-
-            data = response.json()
-            if "result" in data:
-                # Extract values from result
-                result = {}
-                for key, item in data["result"].items():
-                    if isinstance(item, dict) and "value" in item:
-                        result[key] = item["value"]
-                return result
-            return None
-                
-        except Exception as e:
-            Domoticz.Error(f"Error getting meter status: {str(e)}")
-            return None
+        return self._get_device_status("meter", meter_id)
 
     def get_charger_status(self, charger_id):
         """Get detailed status for a specific charger"""
-        try:
-            cookies = self.get_cookies()
-            response = requests.get(
-                f"{self.base_url}/config/devices/charger/{charger_id}/status",
-                cookies=cookies
-            )
-            
-            if response.status_code != 200:
-                Domoticz.Error(f"Failed to get charger status: {response.status_code}")
-                return None
-
-            data = response.json()
-            if "result" in data:
-                # Extract values from result
-                result = {}
-                for key, item in data["result"].items():
-                    if isinstance(item, dict) and "value" in item:
-                        result[key] = item["value"]
-                return result
-            return None
-                
-        except Exception as e:
-            Domoticz.Error(f"Error getting charger status: {str(e)}")
-            return None
\ No newline at end of file
+        return self._get_device_status("charger", charger_id)
\ No newline at end of file
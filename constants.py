@@ -15,6 +15,57 @@ UNIT_BASE_VEHICLE = 100           # Base for vehicle devices (100-199)
 UNIT_BASE_LOADPOINT = 200         # Base for loadpoint devices (200+)
 UNIT_BASE_SESSION = 300           # Base for session metrics (300+)
 
+# Unit layout per device type: (base unit, units reserved per device ID)
+UNIT_LAYOUT = {
+    "site": (UNIT_BASE_SITE, 0),
+    "battery": (UNIT_BASE_BATTERY, 10),
+    "pv": (UNIT_BASE_PV, 10),
+    "tariff": (UNIT_BASE_TARIFF, 0),
+    "grid": (UNIT_BASE_GRID, 0),
+    "vehicle": (UNIT_BASE_VEHICLE, 20),
+    "loadpoint": (UNIT_BASE_LOADPOINT, 20),
+    "session": (UNIT_BASE_SESSION, 10),
+}
+
+# Selector switch levels for EVCC enum values (unknown values map to level 0)
+BATTERY_MODE_LEVELS = {"normal": 10, "hold": 20, "charge": 30, "external": 40}
+VEHICLE_STATUS_LEVELS = {"A": 10, "B": 20, "C": 30, "D": 40, "E": 50, "F": 0}
+LOADPOINT_MODE_LEVELS = {"off": 0, "now": 10, "minpv": 20, "pv": 30}
+LOADPOINT_PHASES_LEVELS = {0: 0, 1: 10, 3: 20}
+
+# Reverse mappings for selector commands: level -> EVCC value
+LOADPOINT_MODE_BY_LEVEL = {level: mode for mode, level in LOADPOINT_MODE_LEVELS.items()}
+LOADPOINT_PHASES_BY_LEVEL = {level: phases for phases, level in LOADPOINT_PHASES_LEVELS.items()}
+BATTERY_MODE_BY_LEVEL = {0: "unknown", 10: "normal", 20: "hold", 30: "charge"}
+
+# Selector switch Options, matching the levels above
+BATTERY_MODE_OPTIONS = {"LevelActions": "||||",
+                        "LevelNames": "Unknown|Normal|Hold|Charge|External",
+                        "LevelOffHidden": "false",
+                        "SelectorStyle": "0"}
+VEHICLE_STATUS_OPTIONS = {"LevelActions": "||||||",
+                          "LevelNames": "Disconnected|Connected|Charging|Complete|Error|Disabled",
+                          "LevelOffHidden": "false",
+                          "SelectorStyle": "0"}
+LOADPOINT_MODE_OPTIONS = {"LevelActions": "||||",
+                          "LevelNames": "Off|Now|Min+PV|PV",
+                          "LevelOffHidden": "false",
+                          "SelectorStyle": "0"}
+LOADPOINT_PHASES_OPTIONS = {"LevelActions": "|||",
+                            "LevelNames": "Auto|1-Phase|3-Phase",
+                            "LevelOffHidden": "false",
+                            "SelectorStyle": "0"}
+
+# Custom sensor Options (axis label) shared by devices of the same unit
+CURRENT_OPTIONS = {'Custom': '1;A'}
+VOLTAGE_OPTIONS = {'Custom': '1;V'}
+TARIFF_OPTIONS = {'Custom': '1;ct/kWh'}
+DISTANCE_OPTIONS = {'Custom': '1;km'}
+PERCENTAGE_OPTIONS = {'Custom': '1;%'}
+MINUTES_OPTIONS = {'Custom': '1;minutes'}
+PRICE_OPTIONS = {'Custom': '1;EUR'}
+PRICE_PER_KWH_OPTIONS = {'Custom': '1;EUR/kWh'}
+
 # Default update interval
 DEFAULT_UPDATE_INTERVAL = 60      # Default to 60 seconds
 
@@ -6,13 +6,73 @@ Author: Mark Heinis
 """
 
 import Domoticz
-from helpers import get_device_unit, update_device_value, format_device_name
-import re
+from helpers import reserve_unit, update_device_value, debug_enabled, split_description
+from constants import (BATTERY_MODE_LEVELS, VEHICLE_STATUS_LEVELS, LOADPOINT_MODE_LEVELS, LOADPOINT_PHASES_LEVELS,
+                       BATTERY_MODE_OPTIONS, VEHICLE_STATUS_OPTIONS, LOADPOINT_MODE_OPTIONS,
+                       LOADPOINT_PHASES_OPTIONS, CURRENT_OPTIONS, VOLTAGE_OPTIONS, TARIFF_OPTIONS,
+                       DISTANCE_OPTIONS, PERCENTAGE_OPTIONS, MINUTES_OPTIONS, PRICE_OPTIONS,
+                       PRICE_PER_KWH_OPTIONS)
 import json
+import time
+
+# Parameters with a device per loadpoint/vehicle, used to precompute mapping keys
+_LOADPOINT_PARAMETERS = ("charging_power", "charged_energy", "mode", "phases", "min_soc", "target_soc",
+                         "charging_timer", "min_current", "max_current", "effective_max_current",
+                         "enable_delay", "disable_delay", "charge_duration", "connected_duration",
+                         "session_energy", "session_price", "session_price_per_kwh",
+                         "session_solar_percentage")
+_VEHICLE_PARAMETERS = ("soc", "range", "status", "odometer", "limit_soc")
+
+# Device name suffix per parameter, as used by create_vehicle_devices/create_loadpoint_devices
+_VEHICLE_SUFFIX = {"soc": " SoC", "range": " Range", "status": " Status",
+                   "odometer": " Odometer", "limit_soc": " Charge Limit"}
+_LOADPOINT_SUFFIX = {"charging_power": " Charging Power", "charged_energy": " Charged Energy",
+                     "mode": " Charging Mode", "phases": " Charging Phases", "min_soc": " Min SoC",
+                     "target_soc": " Target SoC", "charging_timer": " Charging Timer",
+                     "session_energy": " Session Energy", "session_price": " Session Price",
+                     "session_price_per_kwh": " Session Price per KWh",
+                     "session_solar_percentage": " Session Solar Percentage"}
+
+def _name_without_suffix(name, suffix):
+    """Strip the parameter suffix from a device name, or fall back to its first word"""
+    if suffix and name.endswith(suffix) and len(name) > len(suffix):
+        return name[:-len(suffix)]
+    return name.split(" ")[0]
+
+# Rewrite unchanged device values at least this often (seconds) so Domoticz
+# does not mark sensors with a steady value as timed out
+_UNCHANGED_REFRESH_INTERVAL = 300
+
+# Site devices that take an EVCC value as is: (EVCC key, mapping key)
+_SITE_UPDATES = (("homePower", "site_1_home_power"), ("pvPower", "site_1_pv_power"))
+
+# Per loadpoint/vehicle pass-through values: {EVCC key: parameter}. Updates only visit
+# the keys a payload actually contains, via keys() & *_UPDATE_KEYS
+_VEHICLE_UPDATES = {"soc": "soc", "range": "range", "vehicleLimitSoc": "limit_soc"}
+_LOADPOINT_UPDATES = {"chargePower": "charging_power", "chargedEnergy": "charged_energy",
+                      "minSoc": "min_soc", "targetSoc": "target_soc",
+                      "effectiveMinCurrent": "min_current", "maxCurrent": "max_current",
+                      "effectiveMaxCurrent": "effective_max_current",
+                      "enableDelay": "enable_delay", "disableDelay": "disable_delay",
+                      "chargeDuration": "charge_duration", "sessionEnergy": "session_energy",
+                      "sessionPrice": "session_price", "sessionPricePerKWh": "session_price_per_kwh",
+                      "sessionSolarPercentage": "session_solar_percentage"}
+_VEHICLE_UPDATE_KEYS = frozenset(_VEHICLE_UPDATES)
+_LOADPOINT_UPDATE_KEYS = frozenset(_LOADPOINT_UPDATES)
+
+# Tariff devices, shown in cents: (EVCC key, mapping key, label)
+_TARIFF_UPDATES = (("tariffGrid", "tariff_1_grid", "Grid"),
+                   ("tariffPriceHome", "tariff_1_home", "Home"),
+                   ("tariffPriceLoadpoints", "tariff_1_loadpoints", "Loadpoints"))
 
 class DeviceManager:
     """Class for handling device creation and updates"""
     
+    # Fixed attribute set: no per-instance __dict__ on the update hot path
+    __slots__ = ("device_unit_mapping", "unit_device_mapping", "unit_device_info",
+                 "loadpoints", "vehicles", "battery_present", "pv_systems", "grid_details",
+                 "tariffs", "session_stats", "_lp_keys", "_veh_keys", "_device_ids", "_pending", "_last_values", "api")
+    
     def __init__(self):
         # Track created Domoticz.Devices with mapping: {type}_{id}_{parameter} -> unit
         # Example: "vehicle_1_soc" -> unit number
@@ -21,7 +81,10 @@ class DeviceManager:
         # Reverse mapping: unit -> {type}_{id}_{parameter}
         self.unit_device_mapping = {}
         
-        # Track EVCC API objects by ID
+        # Parsed reverse mapping: unit -> {"device_type", "device_id", "parameter"}
+        self.unit_device_info = {}
+        
+        # Track EVCC API objects by ID; loadpoints and vehicles map ID -> display name
         self.loadpoints = {}
         self.vehicles = {}
         self.battery_present = False
@@ -30,46 +93,107 @@ class DeviceManager:
         self.tariffs = {}
         self.session_stats = {}
         
+        # Precomputed mapping keys per loadpoint/vehicle ID: {parameter: key}
+        self._lp_keys = {}
+        self._veh_keys = {}
+        
+        # (type, id) pairs that have at least one mapped unit, to skip updates early
+        self._device_ids = set()
+        
+        # Device values queued during a poll: unit -> (n_value, s_value)
+        self._pending = {}
+        
+        # Last values written per unit: unit -> (n_value, s_value, monotonic time)
+        self._last_values = {}
+        
+        # EVCC API client, assigned by the plugin in onStart
+        self.api = None
+        
         # Load existing device mappings will be done in onStart
         # after Devices are available
 
+    def _unit_for(self, key):
+        """Return the unit mapped to a {type}_{id}_{parameter} key, or None"""
+        return self.device_unit_mapping.get(key)
+
+    def _queue(self, unit, n_value, s_value):
+        """Queue a device value, written by flush(); a later value for the same unit wins"""
+        self._pending[unit] = (n_value, s_value)
+
+    def flush(self, Devices):
+        """Write the queued device values, skipping values the device already shows"""
+        if not self._pending:
+            return
+        now = time.monotonic()
+        last_values = self._last_values
+        for unit, (n_value, s_value) in self._pending.items():
+            last = last_values.get(unit)
+            if (last is not None and last[0] == n_value and last[1] == s_value
+                    and now - last[2] < _UNCHANGED_REFRESH_INTERVAL):
+                continue
+            last_values[unit] = (n_value, s_value, now)
+            update_device_value(unit, n_value, s_value, Devices)
+        self._pending.clear()
+
+    def forget_last_value(self, unit):
+        """Force the next update of a unit, e.g. after a command changed it"""
+        self._last_values.pop(unit, None)
+
+    def _device_keys(self, cache, device_type, device_id, parameters):
+        """Return the {parameter: key} mapping keys for a device ID, building them once"""
+        keys = cache.get(device_id)
+        if keys is None:
+            keys = {parameter: f"{device_type}_{device_id}_{parameter}" for parameter in parameters}
+            cache[device_id] = keys
+        return keys
+
+    def _reserve_unit(self, device_type, device_id, parameter, Devices):
+        """Return (unit, is_new) for a device; is_new means the device must be created"""
+        unit, is_new = reserve_unit(self.device_unit_mapping, self.unit_device_mapping,
+                                    device_type, device_id, parameter, Devices)
+        if unit not in self.unit_device_info:
+            self._store_device_info(unit, device_type, device_id, parameter)
+        return unit, is_new
+
+    def _store_device_info(self, unit, device_type, device_id, parameter):
+        """Remember the parsed type, id and parameter of a unit for get_device_info"""
+        self.unit_device_info[unit] = {
+            "device_type": device_type,
+            "device_id": device_id,
+            "parameter": parameter
+        }
+        self._device_ids.add((device_type, device_id))
+
     def _load_device_mapping(self, Devices):
         """Load device mapping from existing device descriptions"""
-        self.device_unit_mapping = {}
-        self.unit_device_mapping = {}
+        self.unit_device_info = {}
+        self._device_ids = set()
         
-        # Helper function to safely get device ID
-        def get_device_id(text_id):
-            try:
-                if ':' in text_id:
-                    return text_id  # Keep special IDs (like "db:2") as is
-                return int(text_id)  # Convert to int if possible
-            except ValueError:
-                return text_id  # Keep as string if conversion fails
-        
-        for unit in Devices:
-            device = Devices[unit]
+        debug = debug_enabled()
+        pairs = []  # (key, unit), turned into both mappings after the loop
+        for unit, device in Devices.items():
             # Try to extract mappings from device description if it follows our convention
             # Format: {type}_{id}_{parameter}
-            match = re.search(r'^([a-z]+)_([a-zA-Z0-9:]+)_([a-z_]+)$', device.Description)
-            if match:
-                device_type = match.group(1)
-                device_id = get_device_id(match.group(2))
-                parameter = match.group(3)
+            parts = split_description(device.Description)
+            if parts:
+                device_type, device_id, parameter = parts
+                # Convert numeric IDs once; special IDs (like "db:2") stay strings
+                if device_id.isdigit():
+                    device_id = int(device_id)
                 
-                # Store in mapping
-                key = f"{device_type}_{device_id}_{parameter}"
-                self.device_unit_mapping[key] = unit
-                self.unit_device_mapping[unit] = key
+                # Store in mapping, the description already is the mapping key
+                key = device.Description
+                pairs.append((key, unit))
+                self._store_device_info(unit, device_type, device_id, parameter)
                 
                 # Store vehicle info from Name and DeviceID if available
                 if device_type == "vehicle":
-                    vehicle_name = device.Name.split(" ")[0]  # Get name before parameter
+                    vehicle_name = _name_without_suffix(device.Name, _VEHICLE_SUFFIX.get(parameter))
                     self.vehicles[device_id] = vehicle_name
                 
                 # Store loadpoint info
                 elif device_type == "loadpoint":
-                    loadpoint_name = device.Name.split(" ")[0]  # Get name before parameter
+                    loadpoint_name = _name_without_suffix(device.Name, _LOADPOINT_SUFFIX.get(parameter))
                     self.loadpoints[device_id] = loadpoint_name
                 
                 # Track battery presence
@@ -94,63 +218,59 @@ class DeviceManager:
                         self.session_stats[device_id] = {}
                     self.session_stats[device_id][parameter] = unit
                 
-                Domoticz.Debug(f"Loaded device mapping: {key} -> Unit {unit}")
-                if device.DeviceID:
-                    Domoticz.Debug(f"  with external ID: {device.DeviceID}")
+                if debug:
+                    Domoticz.Debug(f"Loaded device mapping: {key} -> Unit {unit}")
+                    if device.DeviceID:
+                        Domoticz.Debug(f"  with external ID: {device.DeviceID}")
+        
+        self.device_unit_mapping = dict(pairs)
+        self.unit_device_mapping = {unit: key for key, unit in pairs}
 
     def create_site_devices(self, site_data, Devices):
         """Create the site Domoticz.Devices based on available data"""
         # Grid power - only instant power, no cumulative energy
         if "gridPower" in site_data or ("grid" in site_data and isinstance(site_data["grid"], dict) and "power" in site_data["grid"]):
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                 "site", 1, "grid_power", True, Devices)
-            if unit not in Devices:
+            unit, is_new = self._reserve_unit("site", 1, "grid_power", Devices)
+            if is_new:
                 Domoticz.Device(Name="Grid Power", Unit=unit, Type=248, Subtype=1,
                               Description="site_1_grid_power", Used=0).Create()
             
             # Create phase current devices if available in meter status
             if "grid" in site_data and isinstance(site_data["grid"], dict) and "phaseCurrents" in site_data["grid"]:
                 for phase, current in enumerate(site_data["grid"]["phaseCurrents"], 1):
-                    unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                         "grid", 1, f"current_l{phase}", True, Devices)
-                    if unit not in Devices:
-                        options = {'Custom': '1;A'}
+                    unit, is_new = self._reserve_unit("grid", 1, f"current_l{phase}", Devices)
+                    if is_new:
                         Domoticz.Device(Unit=unit, Name=f"Grid Current L{phase}", 
-                                      Type=243, Subtype=23, Options=options,
+                                      Type=243, Subtype=23, Options=CURRENT_OPTIONS,
                                       Description=f"grid_1_current_l{phase}", Used=0).Create()
             
             # Create phase voltage devices if available in meter status
             if "grid" in site_data and isinstance(site_data["grid"], dict) and "phaseVoltages" in site_data["grid"]:
                 for phase, voltage in enumerate(site_data["grid"]["phaseVoltages"], 1):
-                    unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                         "grid", 1, f"voltage_l{phase}", True, Devices)
-                    if unit not in Devices:
-                        options = {'Custom': '1;V'}
+                    unit, is_new = self._reserve_unit("grid", 1, f"voltage_l{phase}", Devices)
+                    if is_new:
                         Domoticz.Device(Unit=unit, Name=f"Grid Voltage L{phase}", 
-                                      Type=243, Subtype=8, Options=options,
+                                      Type=243, Subtype=8, Options=VOLTAGE_OPTIONS,
                                       Description=f"grid_1_voltage_l{phase}", Used=0).Create()
         
         # Grid energy meter if available
         if "grid" in site_data and isinstance(site_data["grid"], dict) and "energy" in site_data["grid"]:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                 "grid", 1, "energy", True, Devices)
-            if unit not in Devices:
+            unit, is_new = self._reserve_unit("grid", 1, "energy", Devices)
+            if is_new:
                 Domoticz.Device(Unit=unit, Name="Grid Energy", Type=243, Subtype=29,
                               Description="grid_1_energy", Used=0).Create()
                 
         # Home power - only instant power
         if "homePower" in site_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                 "site", 1, "home_power", True, Devices)
-            if unit not in Devices:
+            unit, is_new = self._reserve_unit("site", 1, "home_power", Devices)
+            if is_new:
                 Domoticz.Device(Name="Home Power", Unit=unit, Type=248, Subtype=1,
                               Description="site_1_home_power", Used=0).Create()
                 
         # PV power - only instant power
         if "pvPower" in site_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                 "site", 1, "pv_power", True, Devices)
-            if unit not in Devices:
+            unit, is_new = self._reserve_unit("site", 1, "pv_power", Devices)
+            if is_new:
                 Domoticz.Device(Name="PV Power", Unit=unit, Type=248, Subtype=1,
                               Description="site_1_pv_power", Used=0).Create()
 
@@ -169,31 +289,25 @@ class DeviceManager:
             
         # Create tariff devices with correct type and format
         if "tariffGrid" in site_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                 "tariff", 1, "grid", True, Devices)
-            if unit not in Devices:
+            unit, is_new = self._reserve_unit("tariff", 1, "grid", Devices)
+            if is_new:
                 Domoticz.Log(f"Creating Grid Tariff device")
-                options = {'Custom': '1;ct/kWh'}
                 Domoticz.Device(Unit=unit, Name="Grid Tariff", Type=243, Subtype=31,
-                              Options=options, Used=0, Description="tariff_1_grid").Create()
+                              Options=TARIFF_OPTIONS, Used=0, Description="tariff_1_grid").Create()
 
         if "tariffPriceHome" in site_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                 "tariff", 1, "home", True, Devices)
-            if unit not in Devices:
+            unit, is_new = self._reserve_unit("tariff", 1, "home", Devices)
+            if is_new:
                 Domoticz.Log(f"Creating Home Tariff device")
-                options = {'Custom': '1;ct/kWh'}
                 Domoticz.Device(Unit=unit, Name="Home Tariff", Type=243, Subtype=31,
-                              Options=options, Used=0, Description="tariff_1_home").Create()
+                              Options=TARIFF_OPTIONS, Used=0, Description="tariff_1_home").Create()
 
         if "tariffPriceLoadpoints" in site_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                 "tariff", 1, "loadpoints", True, Devices)
-            if unit not in Devices:
+            unit, is_new = self._reserve_unit("tariff", 1, "loadpoints", Devices)
+            if is_new:
                 Domoticz.Log(f"Creating Loadpoints Tariff device")
-                options = {'Custom': '1;ct/kWh'}
                 Domoticz.Device(Unit=unit, Name="Loadpoints Tariff", Type=243, Subtype=31,
-                              Options=options, Used=0, Description="tariff_1_loadpoints").Create()
+                              Options=TARIFF_OPTIONS, Used=0, Description="tariff_1_loadpoints").Create()
 
     def create_pv_devices(self, site_data, Devices):
         """Create PV system devices"""
@@ -205,18 +319,16 @@ class DeviceManager:
             self.pv_systems[pv_id] = pv_name
             
             # PV System Power - only instant power
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                 "pv", pv_id, "power", True, Devices)
-            if unit not in Devices:
+            unit, is_new = self._reserve_unit("pv", pv_id, "power", Devices)
+            if is_new:
                 Domoticz.Log(f"Creating device '{pv_name} Power'")
                 Domoticz.Device(Unit=unit, Name=f"{pv_name} Power", Type=248, Subtype=1,
                               Description=f"pv_{pv_id}_power", Used=0).Create()
             
             # Add PV energy meter if available
             if "energy" in pv_system:
-                unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                     "pv", pv_id, "energy", True, Devices)
-                if unit not in Devices:
+                unit, is_new = self._reserve_unit("pv", pv_id, "energy", Devices)
+                if is_new:
                     Domoticz.Log(f"Creating device '{pv_name} Energy'")
                     # For energy meter, use Type=243 (P1 Smart Meter) with Subtype=29 (Electric)
                     Domoticz.Device(Unit=unit, Name=f"{pv_name} Energy", Type=243, Subtype=29,
@@ -226,31 +338,24 @@ class DeviceManager:
         """Create battery Domoticz.Devices"""
         # Battery power - instant power meter
         if "batteryPower" in site_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                 "battery", 1, "power", True, Devices)
-            if unit not in Devices:
+            unit, is_new = self._reserve_unit("battery", 1, "power", Devices)
+            if is_new:
                 Domoticz.Device(Unit=unit, Name="Battery Power", Type=248, Subtype=1,
                               Description="battery_1_power", Used=0).Create()
                 
         # Battery SoC - percentage sensor
         if "batterySoc" in site_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                 "battery", 1, "soc", True, Devices)
-            if unit not in Devices:
+            unit, is_new = self._reserve_unit("battery", 1, "soc", Devices)
+            if is_new:
                 Domoticz.Device(Unit=unit, Name="Battery State of Charge", Type=243, Subtype=6,
                               Description="battery_1_soc", Used=0).Create()
                 
         # Battery mode - selector switch
         if "batteryMode" in site_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                 "battery", 1, "mode", True, Devices)
-            if unit not in Devices:
-                Options = {"LevelActions": "||||",
-                          "LevelNames": "Unknown|Normal|Hold|Charge|External",
-                          "LevelOffHidden": "false",
-                          "SelectorStyle": "0"}
+            unit, is_new = self._reserve_unit("battery", 1, "mode", Devices)
+            if is_new:
                 Domoticz.Device(Unit=unit, Name="Battery Mode", Type=244, Subtype=62, 
-                              Switchtype=18, Image=9, Options=Options, Used=0,
+                              Switchtype=18, Image=9, Options=BATTERY_MODE_OPTIONS, Used=0,
                               Description="battery_1_mode").Create()
     
     def create_battery_devices_from_array(self, site_data, Devices):
@@ -266,59 +371,44 @@ class DeviceManager:
             
             # Battery power - instant power meter
             if "power" in battery:
-                unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                    "battery", battery_id, "power", True, Devices)
-                if unit not in Devices:
+                unit, is_new = self._reserve_unit("battery", battery_id, "power", Devices)
+                if is_new:
                     Domoticz.Log(f"Creating device '{battery_name} Power'")
                     Domoticz.Device(Unit=unit, Name=f"{battery_name} Power", Type=248, Subtype=1,
                                   Description=f"battery_{battery_id}_power", Used=0).Create()
                     
             # Battery SoC - percentage sensor
             if "soc" in battery:
-                unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                    "battery", battery_id, "soc", True, Devices)
-                if unit not in Devices:
+                unit, is_new = self._reserve_unit("battery", battery_id, "soc", Devices)
+                if is_new:
                     Domoticz.Log(f"Creating device '{battery_name} State of Charge'")
                     Domoticz.Device(Unit=unit, Name=f"{battery_name} State of Charge", Type=243, Subtype=6,
                                   Description=f"battery_{battery_id}_soc", Used=0).Create()
             
             # Battery mode if available
             if "mode" in battery:
-                unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                    "battery", battery_id, "mode", True, Devices)
-                if unit not in Devices:
+                unit, is_new = self._reserve_unit("battery", battery_id, "mode", Devices)
+                if is_new:
                     Domoticz.Log(f"Creating device '{battery_name} Mode'")
-                    Options = {"LevelActions": "||||",
-                             "LevelNames": "Unknown|Normal|Hold|Charge|External",
-                             "LevelOffHidden": "false",
-                             "SelectorStyle": "0"}
                     Domoticz.Device(Unit=unit, Name=f"{battery_name} Mode", Type=244, Subtype=62, 
-                                  Switchtype=18, Image=9, Options=Options, Used=0,
+                                  Switchtype=18, Image=9, Options=BATTERY_MODE_OPTIONS, Used=0,
                                   Description=f"battery_{battery_id}_mode").Create()
     
     def create_vehicle_devices(self, vehicle_id, vehicle_data, Devices):
         """Create Domoticz.Devices for a vehicle"""
-        vehicle_name = None
-        if vehicle_id in self.vehicles:
-            if isinstance(self.vehicles[vehicle_id], dict) and "name" in self.vehicles[vehicle_id]:
-                vehicle_name = self.vehicles[vehicle_id]["name"]
-            else:
-                vehicle_name = self.vehicles[vehicle_id]
-        
+        vehicle_name = self.vehicles.get(vehicle_id)
         if not vehicle_name:
             vehicle_name = vehicle_data.get("title", vehicle_data.get("name", f"Vehicle {vehicle_id}"))
             self.vehicles[vehicle_id] = vehicle_name
         
-        Domoticz.Debug(f"Creating devices for vehicle ID {vehicle_id}: {vehicle_name}")
+        if debug_enabled():
+            Domoticz.Debug(f"Creating devices for vehicle ID {vehicle_id}: {vehicle_name}")
         
-        external_id = ""
-        if "original_id" in vehicle_data:
-            external_id = vehicle_data["original_id"]
+        external_id = vehicle_data.get("original_id", "")
         
         # Vehicle SoC - percentage sensor
-        unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                             "vehicle", vehicle_id, "soc", True, Devices)
-        if unit not in Devices:
+        unit, is_new = self._reserve_unit("vehicle", vehicle_id, "soc", Devices)
+        if is_new:
             Domoticz.Log(f"Creating device '{vehicle_name} SoC'")
             Domoticz.Device(Unit=unit, Name=f"{vehicle_name} SoC", Type=243, Subtype=6,
                           Description=f"vehicle_{vehicle_id}_soc", Used=0,
@@ -326,45 +416,35 @@ class DeviceManager:
 
         # Vehicle range - Custom sensor with km unit
         if "range" in vehicle_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                 "vehicle", vehicle_id, "range", True, Devices)
-            if unit not in Devices:
+            unit, is_new = self._reserve_unit("vehicle", vehicle_id, "range", Devices)
+            if is_new:
                 Domoticz.Log(f"Creating device '{vehicle_name} Range'")
-                options = {'Custom': '1;km'}
                 Domoticz.Device(Unit=unit, Name=f"{vehicle_name} Range", Type=243, Subtype=31,
-                              Options=options, Description=f"vehicle_{vehicle_id}_range", Used=0,
+                              Options=DISTANCE_OPTIONS, Description=f"vehicle_{vehicle_id}_range", Used=0,
                               DeviceID=external_id).Create()
             
         # Vehicle status - Selector switch
-        unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                             "vehicle", vehicle_id, "status", True, Devices)
-        if unit not in Devices:
+        unit, is_new = self._reserve_unit("vehicle", vehicle_id, "status", Devices)
+        if is_new:
             Domoticz.Log(f"Creating device '{vehicle_name} Status'")
-            Options = {"LevelActions": "||||||",
-                      "LevelNames": "Disconnected|Connected|Charging|Complete|Error|Disabled",
-                      "LevelOffHidden": "false",
-                      "SelectorStyle": "0"}
             Domoticz.Device(Unit=unit, Name=f"{vehicle_name} Status", Type=244, Subtype=62,
-                          Switchtype=18, Image=9, Options=Options, Used=0,
+                          Switchtype=18, Image=9, Options=VEHICLE_STATUS_OPTIONS, Used=0,
                           Description=f"vehicle_{vehicle_id}_status",
                           DeviceID=external_id).Create()
         
         # Vehicle odometer - Custom sensor with km unit
         if "vehicleOdometer" in vehicle_data or "odometer" in vehicle_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                 "vehicle", vehicle_id, "odometer", True, Devices)
-            if unit not in Devices:
+            unit, is_new = self._reserve_unit("vehicle", vehicle_id, "odometer", Devices)
+            if is_new:
                 Domoticz.Log(f"Creating device '{vehicle_name} Odometer'")
-                options = {'Custom': '1;km'}
                 Domoticz.Device(Unit=unit, Name=f"{vehicle_name} Odometer", Type=243, Subtype=31,
-                              Options=options, Used=0, Description=f"vehicle_{vehicle_id}_odometer",
+                              Options=DISTANCE_OPTIONS, Used=0, Description=f"vehicle_{vehicle_id}_odometer",
                               DeviceID=external_id).Create()
 
         # Vehicle limit SoC - percentage sensor
         if "vehicleLimitSoc" in vehicle_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                 "vehicle", vehicle_id, "limit_soc", True, Devices)
-            if unit not in Devices:
+            unit, is_new = self._reserve_unit("vehicle", vehicle_id, "limit_soc", Devices)
+            if is_new:
                 Domoticz.Log(f"Creating device '{vehicle_name} Charge Limit'")
                 Domoticz.Device(Unit=unit, Name=f"{vehicle_name} Charge Limit", Type=243, Subtype=6,
                               Description=f"vehicle_{vehicle_id}_limit_soc", Used=0,
@@ -372,12 +452,7 @@ class DeviceManager:
     
     def create_loadpoint_devices(self, loadpoint_id, loadpoint_data, Devices):
         """Create Domoticz.Devices for a loadpoint"""
-        loadpoint_name = None
-        if loadpoint_id in self.loadpoints:
-            if isinstance(self.loadpoints[loadpoint_id], dict) and "name" in self.loadpoints[loadpoint_id]:
-                loadpoint_name = self.loadpoints[loadpoint_id]["name"]
-            else:
-                loadpoint_name = self.loadpoints[loadpoint_id]
+        loadpoint_name = self.loadpoints.get(loadpoint_id)
         
         # If no name found yet, try to get it from the loadpoint data
         if not loadpoint_name:
@@ -386,223 +461,174 @@ class DeviceManager:
             self.loadpoints[loadpoint_id] = loadpoint_name
             
         # Log the loadpoint being created
-        Domoticz.Debug(f"Creating devices for loadpoint ID {loadpoint_id}: {loadpoint_name}")
+        if debug_enabled():
+            Domoticz.Debug(f"Creating devices for loadpoint ID {loadpoint_id}: {loadpoint_name}")
         
         # Use the original_id as DeviceID if provided
-        external_id = ""
-        if "original_id" in loadpoint_data:
-            external_id = loadpoint_data["original_id"]
+        external_id = loadpoint_data.get("original_id", "")
         
         # Charging power - only instant power
-        unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                            "loadpoint", loadpoint_id, "charging_power", True, Devices)
-        if unit not in Devices:
+        unit, is_new = self._reserve_unit("loadpoint", loadpoint_id, "charging_power", Devices)
+        if is_new:
             Domoticz.Device(Unit=unit, Name=f"{loadpoint_name} Charging Power", Type=248, Subtype=1,
                           Description=f"loadpoint_{loadpoint_id}_charging_power", Used=0).Create()
         
         # Charged energy - cumulative energy device
-        unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                            "loadpoint", loadpoint_id, "charged_energy", True, Devices)
-        if unit not in Devices:
+        unit, is_new = self._reserve_unit("loadpoint", loadpoint_id, "charged_energy", Devices)
+        if is_new:
             # For energy meter, use Type=243 (P1 Smart Meter) with Subtype=29 (Electric)
             Domoticz.Device(Unit=unit, Name=f"{loadpoint_name} Charged Energy", Type=243, Subtype=29,
                           Description=f"loadpoint_{loadpoint_id}_charged_energy", Used=0).Create()
             
         # Charging mode selector
-        unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                            "loadpoint", loadpoint_id, "mode", True, Devices)
-        if unit not in Devices:
-            Options = {"LevelActions": "||||",
-                      "LevelNames": "Off|Now|Min+PV|PV",
-                      "LevelOffHidden": "false",
-                      "SelectorStyle": "0"}
+        unit, is_new = self._reserve_unit("loadpoint", loadpoint_id, "mode", Devices)
+        if is_new:
             Domoticz.Device(Unit=unit, Name=f"{loadpoint_name} Charging Mode", Type=244, Subtype=62, 
-                          Switchtype=18, Image=9, Options=Options, Used=0, 
+                          Switchtype=18, Image=9, Options=LOADPOINT_MODE_OPTIONS, Used=0, 
                           Description=f"loadpoint_{loadpoint_id}_mode", 
                           DeviceID=external_id).Create()
         
-        unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                            "loadpoint", loadpoint_id, "phases", True, Devices)
-        if unit not in Devices:
-            Options = {"LevelActions": "|||",
-                      "LevelNames": "Auto|1-Phase|3-Phase",
-                      "LevelOffHidden": "false",
-                      "SelectorStyle": "0"}
+        unit, is_new = self._reserve_unit("loadpoint", loadpoint_id, "phases", Devices)
+        if is_new:
             Domoticz.Device(Unit=unit, Name=f"{loadpoint_name} Charging Phases", Type=244, Subtype=62, 
-                          Switchtype=18, Image=9, Options=Options, Used=0, 
+                          Switchtype=18, Image=9, Options=LOADPOINT_PHASES_OPTIONS, Used=0, 
                           Description=f"loadpoint_{loadpoint_id}_phases", 
                           DeviceID=external_id).Create()
             
         # Min SoC percentage if applicable
         if "minSoc" in loadpoint_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                "loadpoint", loadpoint_id, "min_soc", True, Devices)
-            if unit not in Devices:
-                options = {'Custom': '1;%'}
+            unit, is_new = self._reserve_unit("loadpoint", loadpoint_id, "min_soc", Devices)
+            if is_new:
                 Domoticz.Device(Unit=unit, Name=f"{loadpoint_name} Min SoC", Type=243, Subtype=6, 
-                            Options=options, Used=0, Description=f"loadpoint_{loadpoint_id}_min_soc", 
+                            Options=PERCENTAGE_OPTIONS, Used=0, Description=f"loadpoint_{loadpoint_id}_min_soc", 
                             DeviceID=external_id).Create()
             
         # Target SoC percentage if applicable
         if "targetSoc" in loadpoint_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                "loadpoint", loadpoint_id, "target_soc", True, Devices)
-            if unit not in Devices:
-                options = {'Custom': '1;%'}
+            unit, is_new = self._reserve_unit("loadpoint", loadpoint_id, "target_soc", Devices)
+            if is_new:
                 Domoticz.Device(Unit=unit, Name=f"{loadpoint_name} Target SoC", Type=243, Subtype=6, 
-                            Options=options, Used=0, Description=f"loadpoint_{loadpoint_id}_target_soc", 
+                            Options=PERCENTAGE_OPTIONS, Used=0, Description=f"loadpoint_{loadpoint_id}_target_soc", 
                             DeviceID=external_id).Create()
         
         # Charging timer
-        unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                            "loadpoint", loadpoint_id, "charging_timer", True, Devices)
-        if unit not in Devices:
-            options = {'Custom': '1;minutes'}
+        unit, is_new = self._reserve_unit("loadpoint", loadpoint_id, "charging_timer", Devices)
+        if is_new:
             Domoticz.Device(Unit=unit, Name=f"{loadpoint_name} Charging Timer", Type=243, Subtype=8, 
-                          Options=options, Used=0, Description=f"loadpoint_{loadpoint_id}_charging_timer", 
+                          Options=MINUTES_OPTIONS, Used=0, Description=f"loadpoint_{loadpoint_id}_charging_timer", 
                           DeviceID=external_id).Create()
             
         # Create session statistics devices
         if "sessionEnergy" in loadpoint_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                "loadpoint", loadpoint_id, "session_energy", True, Devices)
-            if unit not in Devices:
+            unit, is_new = self._reserve_unit("loadpoint", loadpoint_id, "session_energy", Devices)
+            if is_new:
                 Domoticz.Device(Unit=unit, Name=f"{loadpoint_name} Session Energy", Type=243, Subtype=29,
                             Description=f"loadpoint_{loadpoint_id}_session_energy", Used=0).Create()
 
         if "sessionPrice" in loadpoint_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                "loadpoint", loadpoint_id, "session_price", True, Devices)
-            if unit not in Devices:
-                options = {'Custom': '1;EUR'}
+            unit, is_new = self._reserve_unit("loadpoint", loadpoint_id, "session_price", Devices)
+            if is_new:
                 Domoticz.Device(Unit=unit, Name=f"{loadpoint_name} Session Price", Type=243, Subtype=31,
-                            Options=options, Used=0, Description=f"loadpoint_{loadpoint_id}_session_price").Create()
+                            Options=PRICE_OPTIONS, Used=0, Description=f"loadpoint_{loadpoint_id}_session_price").Create()
 
         if "sessionPricePerKWh" in loadpoint_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                "loadpoint", loadpoint_id, "session_price_per_kwh", True, Devices)
-            if unit not in Devices:
-                options = {'Custom': '1;EUR/kWh'}
+            unit, is_new = self._reserve_unit("loadpoint", loadpoint_id, "session_price_per_kwh", Devices)
+            if is_new:
                 Domoticz.Device(Unit=unit, Name=f"{loadpoint_name} Session Price per KWh", Type=243, Subtype=31,
-                            Options=options, Used=0, Description=f"loadpoint_{loadpoint_id}_session_price_per_kwh").Create()
+                            Options=PRICE_PER_KWH_OPTIONS, Used=0, Description=f"loadpoint_{loadpoint_id}_session_price_per_kwh").Create()
 
         if "sessionSolarPercentage" in loadpoint_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                "loadpoint", loadpoint_id, "session_solar_percentage", True, Devices)
-            if unit not in Devices:
-                options = {'Custom': '1;%'}
+            unit, is_new = self._reserve_unit("loadpoint", loadpoint_id, "session_solar_percentage", Devices)
+            if is_new:
                 Domoticz.Device(Unit=unit, Name=f"{loadpoint_name} Session Solar Percentage", Type=243, Subtype=6,
-                            Options=options, Used=0, Description=f"loadpoint_{loadpoint_id}_session_solar_percentage").Create()
+                            Options=PERCENTAGE_OPTIONS, Used=0, Description=f"loadpoint_{loadpoint_id}_session_solar_percentage").Create()
     
     def update_site_devices(self, site_data, Devices):
         """Update site Domoticz.Devices"""
         # Grid power - handle both formats (direct or nested in grid object)
-        if "gridPower" in site_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                 "site", 1, "grid_power", False, Devices)
-            if unit is not None:
-                update_device_value(unit, 0, site_data["gridPower"], Devices)
-        elif "grid" in site_data and isinstance(site_data["grid"], dict):
-            if "power" in site_data["grid"]:
-                unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                     "site", 1, "grid_power", False, Devices)
+        grid_power = site_data.get("gridPower")
+        grid = site_data.get("grid")
+        if grid_power is not None:
+            unit = self._unit_for("site_1_grid_power")
+            if unit is not None:
+                self._queue(unit, 0, grid_power)
+        elif isinstance(grid, dict):
+            grid_power = grid.get("power")
+            if grid_power is not None:
+                unit = self._unit_for("site_1_grid_power")
                 if unit is not None:
-                    update_device_value(unit, 0, site_data["grid"]["power"], Devices)
+                    self._queue(unit, 0, grid_power)
                     
             # Update phase currents if available
-            if "currents" in site_data["grid"]:
-                currents = site_data["grid"]["currents"]
-                for phase in range(len(currents)):
-                    unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                         "grid", 1, f"current_l{phase+1}", False, Devices)
+            currents = grid.get("currents")
+            if currents is not None:
+                for phase, current in enumerate(currents, 1):
+                    unit = self._unit_for(f"grid_1_current_l{phase}")
                     if unit is not None:
-                        update_device_value(unit, 0, currents[phase], Devices)
+                        self._queue(unit, 0, current)
                         
             # Update grid energy
-            if "energy" in site_data["grid"]:
-                unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                     "grid", 1, "energy", False, Devices)
+            energy = grid.get("energy")
+            if energy is not None:
+                unit = self._unit_for("grid_1_energy")
                 if unit is not None:
-                    update_device_value(unit, 0, site_data["grid"]["energy"], Devices)
+                    self._queue(unit, 0, energy)
         
-        # Home power
-        if "homePower" in site_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                 "site", 1, "home_power", False, Devices)
-            if unit is not None:
-                update_device_value(unit, 0, site_data["homePower"], Devices)
-                
-        # PV power
-        if "pvPower" in site_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                 "site", 1, "pv_power", False, Devices)
-            if unit is not None:
-                update_device_value(unit, 0, site_data["pvPower"], Devices)
+        # Home and PV power
+        for evcc_key, key in _SITE_UPDATES:
+            value = site_data.get(evcc_key)
+            if value is not None:
+                unit = self._unit_for(key)
+                if unit is not None:
+                    self._queue(unit, 0, value)
         
         # Update PV system devices if available
-        if "pv" in site_data and isinstance(site_data["pv"], list) and len(site_data["pv"]) > 0:
+        pv_systems = site_data.get("pv")
+        if isinstance(pv_systems, list) and pv_systems:
             self.update_pv_devices(site_data, Devices)
             
         # Try both direct battery fields and battery array format
-        if "batteryPower" in site_data or "batterySoc" in site_data or "battery" in site_data:
+        if self.battery_present and ("batteryPower" in site_data or "batterySoc" in site_data or "battery" in site_data):
             # Handle flat format
-            if "batteryPower" in site_data:
-                unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                     "battery", 1, "power", False, Devices)
+            battery_power = site_data.get("batteryPower")
+            if battery_power is not None:
+                unit = self._unit_for("battery_1_power")
                 if unit is not None:
                     # Invert the power value for intuitive display
                     # Negative values in EVCC (charging) become positive in Domoticz
                     # Positive values in EVCC (discharging) become negative in Domoticz
-                    battery_power = -1 * site_data["batteryPower"]
-                    Domoticz.Debug(f"Inverting battery power from {site_data['batteryPower']} to {battery_power}")
-                    update_device_value(unit, 0, battery_power, Devices)
+                    if debug_enabled():
+                        Domoticz.Debug(f"Inverting battery power from {battery_power} to {-battery_power}")
+                    battery_power = -battery_power
+                    self._queue(unit, 0, battery_power)
                     
-            if "batterySoc" in site_data:
-                unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                     "battery", 1, "soc", False, Devices)
+            battery_soc = site_data.get("batterySoc")
+            if battery_soc is not None:
+                unit = self._unit_for("battery_1_soc")
                 if unit is not None:
-                    update_device_value(unit, 0, site_data["batterySoc"], Devices)
+                    self._queue(unit, 0, battery_soc)
                     
-            if "batteryMode" in site_data:
-                unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                     "battery", 1, "mode", False, Devices)
+            battery_mode = site_data.get("batteryMode")
+            if battery_mode is not None:
+                unit = self._unit_for("battery_1_mode")
                 if unit is not None:
-                    mode = site_data["batteryMode"].lower()
-                    mode_value = 0  # unknown
-                    if mode == "normal": mode_value = 10
-                    elif mode == "hold": mode_value = 20
-                    elif mode == "charge": mode_value = 30
-                    elif mode == "external": mode_value = 40
-                    update_device_value(unit, mode_value, 0, Devices)
+                    mode_value = BATTERY_MODE_LEVELS.get(battery_mode.lower(), 0)
+                    self._queue(unit, mode_value, 0)
             
             # Handle array format
-            if "battery" in site_data and isinstance(site_data["battery"], list):
+            if isinstance(site_data.get("battery"), list):
                 self.update_battery_devices_from_array(site_data, Devices)
         
         # Update tariff devices
-        if "tariffGrid" in site_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                 "tariff", 1, "grid", False, Devices)
-            if unit is not None:
-                value = float(site_data["tariffGrid"]) * 100  # Convert to cents
-                Domoticz.Debug(f"Updating Grid Tariff device (Unit {unit}) to: {value} cents")
-                update_device_value(unit, 0, str(value), Devices)
-
-        if "tariffPriceHome" in site_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                 "tariff", 1, "home", False, Devices)
-            if unit is not None:
-                value = float(site_data["tariffPriceHome"]) * 100  # Convert to cents
-                Domoticz.Debug(f"Updating Home Tariff device (Unit {unit}) to: {value} cents")
-                update_device_value(unit, 0, str(value), Devices)
-
-        if "tariffPriceLoadpoints" in site_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                 "tariff", 1, "loadpoints", False, Devices)
-            if unit is not None:
-                value = float(site_data["tariffPriceLoadpoints"]) * 100  # Convert to cents
-                Domoticz.Debug(f"Updating Loadpoints Tariff device (Unit {unit}) to: {value} cents")
-                update_device_value(unit, 0, str(value), Devices)
+        for evcc_key, key, label in _TARIFF_UPDATES:
+            tariff = site_data.get(evcc_key)
+            if tariff is not None:
+                unit = self._unit_for(key)
+                if unit is not None:
+                    value = float(tariff) * 100  # Convert to cents
+                    if debug_enabled():
+                        Domoticz.Debug(f"Updating {label} Tariff device (Unit {unit}) to: {value} cents")
+                    self._queue(unit, 0, str(value))
     
     def update_pv_devices(self, site_data, Devices):
         """Update PV system devices"""
@@ -612,56 +638,55 @@ class DeviceManager:
             pv_id = i + 1
             
             # PV System Power
-            if "power" in pv_system:
-                unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                      "pv", pv_id, "power", False, Devices)
+            power = pv_system.get("power")
+            if power is not None:
+                unit = self._unit_for(f"pv_{pv_id}_power")
                 if unit is not None:
-                    power = pv_system["power"]
-                    Domoticz.Debug(f"Updating PV system {pv_id} power to: {power}W")
-                    update_device_value(unit, 0, power, Devices)
+                    if debug_enabled():
+                        Domoticz.Debug(f"Updating PV system {pv_id} power to: {power}W")
+                    self._queue(unit, 0, power)
             
             # PV System Energy
-            if "energy" in pv_system:
-                unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                      "pv", pv_id, "energy", False, Devices)
+            energy = pv_system.get("energy")
+            if energy is not None:
+                unit = self._unit_for(f"pv_{pv_id}_energy")
                 if unit is not None:
-                    energy = pv_system["energy"]
-                    Domoticz.Debug(f"Updating PV system {pv_id} energy to: {energy}kWh")
-                    update_device_value(unit, 0, energy, Devices)
+                    if debug_enabled():
+                        Domoticz.Debug(f"Updating PV system {pv_id} energy to: {energy}kWh")
+                    self._queue(unit, 0, energy)
     
     def update_battery_devices(self, site_data, Devices):
         """Update battery Domoticz.Devices"""
+        if not self.battery_present:
+            return
+        
         # Battery power
-        if "batteryPower" in site_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                  "battery", 1, "power", False, Devices)
+        battery_power = site_data.get("batteryPower")
+        if battery_power is not None:
+            unit = self._unit_for("battery_1_power")
             if unit is not None:
                 # Invert the power value for intuitive display
                 # Negative values in EVCC (charging) become positive in Domoticz
                 # Positive values in EVCC (discharging) become negative in Domoticz
-                battery_power = -1 * site_data["batteryPower"]
-                Domoticz.Debug(f"Inverting battery power from {site_data['batteryPower']} to {battery_power}")
-                update_device_value(unit, 0, battery_power, Devices)
+                if debug_enabled():
+                    Domoticz.Debug(f"Inverting battery power from {battery_power} to {-battery_power}")
+                battery_power = -battery_power
+                self._queue(unit, 0, battery_power)
                 
         # Battery SoC
-        if "batterySoc" in site_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                  "battery", 1, "soc", False, Devices)
+        battery_soc = site_data.get("batterySoc")
+        if battery_soc is not None:
+            unit = self._unit_for("battery_1_soc")
             if unit is not None:
-                update_device_value(unit, 0, site_data["batterySoc"], Devices)
+                self._queue(unit, 0, battery_soc)
                 
         # Battery mode
-        if "batteryMode" in site_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                  "battery", 1, "mode", False, Devices)
+        battery_mode = site_data.get("batteryMode")
+        if battery_mode is not None:
+            unit = self._unit_for("battery_1_mode")
             if unit is not None:
-                mode = site_data["batteryMode"].lower()
-                mode_value = 0  # unknown
-                if mode == "normal": mode_value = 10
-                elif mode == "hold": mode_value = 20
-                elif mode == "charge": mode_value = 30
-                elif mode == "external": mode_value = 40
-                update_device_value(unit, mode_value, 0, Devices)
+                mode_value = BATTERY_MODE_LEVELS.get(battery_mode.lower(), 0)
+                self._queue(unit, mode_value, 0)
     
     def update_battery_devices_from_array(self, site_data, Devices):
         """Update battery devices from WebSocket battery array format"""
@@ -674,233 +699,119 @@ class DeviceManager:
             battery_id = i + 1
             
             # Battery power
-            if "power" in battery:
-                unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                      "battery", battery_id, "power", False, Devices)
+            battery_power = battery.get("power")
+            if battery_power is not None:
+                unit = self._unit_for(f"battery_{battery_id}_power")
                 if unit is not None:
                     # Invert the power value for intuitive display
                     # Negative values in EVCC (charging) become positive in Domoticz
                     # Positive values in EVCC (discharging) become negative in Domoticz
-                    battery_power = -1 * battery["power"]
-                    Domoticz.Debug(f"Inverting battery {battery_id} power from {battery['power']} to {battery_power}")
-                    update_device_value(unit, 0, battery_power, Devices)
+                    if debug_enabled():
+                        Domoticz.Debug(f"Inverting battery {battery_id} power from {battery_power} to {-battery_power}")
+                    battery_power = -battery_power
+                    self._queue(unit, 0, battery_power)
                     
             # Battery SoC
-            if "soc" in battery:
-                unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                      "battery", battery_id, "soc", False, Devices)
+            battery_soc = battery.get("soc")
+            if battery_soc is not None:
+                unit = self._unit_for(f"battery_{battery_id}_soc")
                 if unit is not None:
-                    update_device_value(unit, 0, battery["soc"], Devices)
+                    self._queue(unit, 0, battery_soc)
     
     def update_vehicle_devices(self, vehicle_id, vehicle_data, Devices):
         """Update vehicle Domoticz.Devices"""
-        Domoticz.Debug(f"Updating vehicle {vehicle_id} with data: {json.dumps(vehicle_data)}")
+        if ("vehicle", vehicle_id) not in self._device_ids:
+            return
         
-        # Vehicle SoC
-        if "soc" in vehicle_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                  "vehicle", vehicle_id, "soc", False, Devices)
-            if unit is not None:
-                update_device_value(unit, 0, vehicle_data["soc"], Devices)
-                
-        # Vehicle range
-        if "range" in vehicle_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                  "vehicle", vehicle_id, "range", False, Devices)
-            if unit is not None:
-                update_device_value(unit, 0, vehicle_data["range"], Devices)
+        keys = self._device_keys(self._veh_keys, "vehicle", vehicle_id, _VEHICLE_PARAMETERS)
+        if debug_enabled():
+            Domoticz.Debug(f"Updating vehicle {vehicle_id} with data: {json.dumps(vehicle_data)}")
+        
+        # Vehicle SoC, range and charge limit
+        # Bind the lookups locally, this loop runs for every poll
+        unit_for = self.device_unit_mapping.get
+        queue = self._queue
+        for evcc_key in vehicle_data.keys() & _VEHICLE_UPDATE_KEYS:
+            value = vehicle_data[evcc_key]
+            if value is not None:
+                unit = unit_for(keys[_VEHICLE_UPDATES[evcc_key]])
+                if unit is not None:
+                    queue(unit, 0, value)
         
         # Vehicle status - either from direct status or chargeStatus
-        if "status" in vehicle_data or "chargeStatus" in vehicle_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                  "vehicle", vehicle_id, "status", False, Devices)
+        status = vehicle_data.get("status", vehicle_data.get("chargeStatus"))
+        if status is not None:
+            unit = self._unit_for(keys["status"])
             if unit is not None:
-                # Get status from either field
-                status = vehicle_data.get("status", vehicle_data.get("chargeStatus", "F"))
-                status_value = 0  # Disconnected (F)
-                
-                Domoticz.Debug(f"Setting vehicle {vehicle_id} status to: {status}")
-                
-                # Map status codes to selector switch values
-                if status == "A": status_value = 10    # Connected
-                elif status == "B": status_value = 20  # Charging
-                elif status == "C": status_value = 30  # Complete
-                elif status == "D": status_value = 40  # Error
-                elif status == "E": status_value = 50  # Disabled
-                elif status == "F": status_value = 0   # Disconnected
+                # Map status codes to selector switch values, unknown codes show as disconnected
+                status_value = VEHICLE_STATUS_LEVELS.get(status, 0)
                 
-                Domoticz.Debug(f"Vehicle {vehicle_id} status value mapped to: {status_value}")
-                update_device_value(unit, status_value, 0, Devices)
+                if debug_enabled():
+                    Domoticz.Debug(f"Setting vehicle {vehicle_id} status to: {status}")
+                    Domoticz.Debug(f"Vehicle {vehicle_id} status value mapped to: {status_value}")
+                self._queue(unit, status_value, 0)
         
         # Update odometer - check both possible field names
-        if "vehicleOdometer" in vehicle_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                "vehicle", vehicle_id, "odometer", False, Devices)
-            if unit is not None:
-                update_device_value(unit, 0, vehicle_data["vehicleOdometer"], Devices)
-        elif "odometer" in vehicle_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                "vehicle", vehicle_id, "odometer", False, Devices)
-            if unit is not None:
-                update_device_value(unit, 0, vehicle_data["odometer"], Devices)
-
-        # Update vehicle limit
-        if "vehicleLimitSoc" in vehicle_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                "vehicle", vehicle_id, "limit_soc", False, Devices)
+        odometer = vehicle_data.get("vehicleOdometer", vehicle_data.get("odometer"))
+        if odometer is not None:
+            unit = self._unit_for(keys["odometer"])
             if unit is not None:
-                update_device_value(unit, 0, vehicle_data["vehicleLimitSoc"], Devices)
+                self._queue(unit, 0, odometer)
     
     def update_loadpoint_devices(self, loadpoint_id, loadpoint_data, Devices):
         """Update loadpoint Domoticz.Devices"""
-        # Charging power
-        if "chargePower" in loadpoint_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                  "loadpoint", loadpoint_id, "charging_power", False, Devices)
-            if unit is not None:
-                update_device_value(unit, 0, loadpoint_data["chargePower"], Devices)
+        if ("loadpoint", loadpoint_id) not in self._device_ids:
+            return
+        
+        keys = self._device_keys(self._lp_keys, "loadpoint", loadpoint_id, _LOADPOINT_PARAMETERS)
+        # Power, energy, SoC limits, currents, delays and session statistics
+        # Bind the lookups locally, this loop runs for every poll
+        unit_for = self.device_unit_mapping.get
+        queue = self._queue
+        for evcc_key in loadpoint_data.keys() & _LOADPOINT_UPDATE_KEYS:
+            value = loadpoint_data[evcc_key]
+            if value is not None:
+                unit = unit_for(keys[_LOADPOINT_UPDATES[evcc_key]])
+                if unit is not None:
+                    queue(unit, 0, value)
         
-        # Charged energy
-        if "chargedEnergy" in loadpoint_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                  "loadpoint", loadpoint_id, "charged_energy", False, Devices)
-            if unit is not None:
-                update_device_value(unit, 0, loadpoint_data["chargedEnergy"], Devices)
-                
         # Charging mode
-        if "mode" in loadpoint_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                  "loadpoint", loadpoint_id, "mode", False, Devices)
+        mode = loadpoint_data.get("mode")
+        if mode is not None:
+            unit = self._unit_for(keys["mode"])
             if unit is not None:
-                mode = loadpoint_data["mode"]
-                mode_value = 0
-                if mode == "off": mode_value = 0
-                elif mode == "now": mode_value = 10
-                elif mode == "minpv": mode_value = 20
-                elif mode == "pv": mode_value = 30
-                update_device_value(unit, mode_value, 0, Devices)
+                mode_value = LOADPOINT_MODE_LEVELS.get(mode, 0)
+                self._queue(unit, mode_value, 0)
         
         # Phases
-        if "phases" in loadpoint_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                  "loadpoint", loadpoint_id, "phases", False, Devices)
+        phases = loadpoint_data.get("phases")
+        if phases is not None:
+            unit = self._unit_for(keys["phases"])
             if unit is not None:
-                phases = loadpoint_data["phases"]
-                phases_value = 0
-                if phases == 0: phases_value = 0  # auto
-                elif phases == 1: phases_value = 10  # 1-phase
-                elif phases == 3: phases_value = 20  # 3-phase
-                update_device_value(unit, phases_value, 0, Devices)
-        
-        # Min SoC
-        if "minSoc" in loadpoint_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                  "loadpoint", loadpoint_id, "min_soc", False, Devices)
-            if unit is not None:
-                update_device_value(unit, 0, loadpoint_data["minSoc"], Devices)
-        
-        # Target SoC
-        if "targetSoc" in loadpoint_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                  "loadpoint", loadpoint_id, "target_soc", False, Devices)
-            if unit is not None:
-                update_device_value(unit, 0, loadpoint_data["targetSoc"], Devices)
+                phases_value = LOADPOINT_PHASES_LEVELS.get(phases, 0)
+                self._queue(unit, phases_value, 0)
         
         # Charging timer
-        unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                              "loadpoint", loadpoint_id, "charging_timer", False, Devices)
+        unit = self._unit_for(keys["charging_timer"])
         if unit is not None:
-            if "charging" in loadpoint_data and loadpoint_data["charging"]:
-                if "chargeTimer" in loadpoint_data:
-                    charge_timer = loadpoint_data["chargeTimer"]
-                    minutes = int(charge_timer / 60)
-                    update_device_value(unit, 0, minutes, Devices)
+            if loadpoint_data.get("charging"):
+                charge_timer = loadpoint_data.get("chargeTimer")
+                if charge_timer is not None:
+                    minutes = int(charge_timer) // 60
+                    self._queue(unit, 0, minutes)
             else:
-                update_device_value(unit, 0, 0, Devices)
+                self._queue(unit, 0, 0)
         
-        # Update current limits
-        if "effectiveMinCurrent" in loadpoint_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                "loadpoint", loadpoint_id, "min_current", False, Devices)
+        # Connected duration
+        connected_duration = loadpoint_data.get("connectedDuration")
+        if connected_duration is not None:
+            unit = self._unit_for(keys["connected_duration"])
             if unit is not None:
-                update_device_value(unit, 0, loadpoint_data["effectiveMinCurrent"], Devices)
-
-        if "maxCurrent" in loadpoint_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                "loadpoint", loadpoint_id, "max_current", False, Devices)
-            if unit is not None:
-                update_device_value(unit, 0, loadpoint_data["maxCurrent"], Devices)
-
-        if "effectiveMaxCurrent" in loadpoint_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                "loadpoint", loadpoint_id, "effective_max_current", False, Devices)
-            if unit is not None:
-                update_device_value(unit, 0, loadpoint_data["effectiveMaxCurrent"], Devices)
-
-        # Update timing devices
-        if "enableDelay" in loadpoint_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                "loadpoint", loadpoint_id, "enable_delay", False, Devices)
-            if unit is not None:
-                update_device_value(unit, 0, loadpoint_data["enableDelay"], Devices)
-
-        if "disableDelay" in loadpoint_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                "loadpoint", loadpoint_id, "disable_delay", False, Devices)
-            if unit is not None:
-                update_device_value(unit, 0, loadpoint_data["disableDelay"], Devices)
-
-        if "chargeDuration" in loadpoint_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                "loadpoint", loadpoint_id, "charge_duration", False, Devices)
-            if unit is not None:
-                update_device_value(unit, 0, loadpoint_data["chargeDuration"], Devices)
-
-        if "connectedDuration" in loadpoint_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                "loadpoint", loadpoint_id, "connected_duration", False, Devices)
-            if unit is not None:
-                if loadpoint_data["connectedDuration"] == 2147483647:  # Max int value, means not connected
-                    update_device_value(unit, 0, 0, Devices)
+                if connected_duration == 2147483647:  # Max int value, means not connected
+                    self._queue(unit, 0, 0)
                 else:
-                    update_device_value(unit, 0, loadpoint_data["connectedDuration"], Devices)
-        
-        # Update session statistics devices
-        if "sessionEnergy" in loadpoint_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                 "loadpoint", loadpoint_id, "session_energy", False, Devices)
-            if unit is not None:
-                update_device_value(unit, 0, loadpoint_data["sessionEnergy"], Devices)
-
-        if "sessionPrice" in loadpoint_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                 "loadpoint", loadpoint_id, "session_price", False, Devices)
-            if unit is not None:
-                update_device_value(unit, 0, loadpoint_data["sessionPrice"], Devices)
-
-        if "sessionPricePerKWh" in loadpoint_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                 "loadpoint", loadpoint_id, "session_price_per_kwh", False, Devices)
-            if unit is not None:
-                update_device_value(unit, 0, loadpoint_data["sessionPricePerKWh"], Devices)
+                    self._queue(unit, 0, connected_duration)
 
-        if "sessionSolarPercentage" in loadpoint_data:
-            unit = get_device_unit(self.device_unit_mapping, self.unit_device_mapping, 
-                                 "loadpoint", loadpoint_id, "session_solar_percentage", False, Devices)
-            if unit is not None:
-                update_device_value(unit, 0, loadpoint_data["sessionSolarPercentage"], Devices)
-                
     def get_device_info(self, unit):
         """Get device type, id and parameter from unit number"""
-        if unit not in self.unit_device_mapping:
-            return None
-            
-        device_info = self.unit_device_mapping[unit].split("_")
-        if len(device_info) < 3:
-            return None
-            
-        return {
-            "device_type": device_info[0],
-            "device_id": device_info[1],
-            "parameter": device_info[2]
-        }
\ No newline at end of file
+        return self.unit_device_info.get(unit)
\ No newline at end of file
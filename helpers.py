@@ -6,18 +6,34 @@ Author: Mark Heinis
 """
 
 import Domoticz
-import re
+from constants import UNIT_LAYOUT
 
-def extract_device_info_from_description(description):
-    """Extract device type, id, and parameter from device description"""
-    match = re.search(r'^([a-z]+)_([a-zA-Z0-9:]+)_([a-z_]+)$', description)
-    if match:
-        return {
-            'device_type': match.group(1),
-            'device_id': match.group(2),
-            'parameter': match.group(3)
-        }
-    return None
+# Whether Domoticz debug logging is enabled, set from the plugin Debug parameter
+_debug = False
+
+def set_debug(enabled):
+    """Enable or disable building of debug log messages"""
+    global _debug
+    _debug = enabled
+
+def debug_enabled():
+    """Return True if debug messages should be built and logged"""
+    return _debug
+
+def split_description(description):
+    """Split a {type}_{id}_{parameter} device description, or return None"""
+    parts = description.split("_", 2)
+    if len(parts) != 3 or not description.isascii():
+        return None
+    device_type, device_id, parameter = parts
+    if not (device_type.isalpha() and device_type.islower()):
+        return None
+    if not device_id.replace(":", "").isalnum():
+        return None
+    # Parameters are lower case words, optionally with a phase number (current_l1)
+    if not (parameter.replace("_", "").isalnum() and parameter.islower()):
+        return None
+    return parts
 
 def update_device_value(unit, n_value, s_value, Devices=None):
     """Helper method to update device values"""
@@ -70,7 +86,8 @@ def update_device_value(unit, n_value, s_value, Devices=None):
             else:
                 s_value = str(s_value)
             
-        Domoticz.Debug(f"Updating device {unit} - n_value: {n_value}, s_value: {s_value}")
+        if debug_enabled():
+            Domoticz.Debug(f"Updating device {unit} - n_value: {n_value}, s_value: {s_value}")
         
         # Create update dict with only required parameters
         update_dict = {
@@ -87,11 +104,6 @@ def update_device_value(unit, n_value, s_value, Devices=None):
 
 def get_device_unit(device_mapping, unit_device_mapping, device_type, device_id, parameter, create_new=False, Devices=None):
     """Get or create a device unit number for the specified device"""
-    # Import here to avoid circular imports
-    from constants import (UNIT_BASE_SITE, UNIT_BASE_BATTERY, UNIT_BASE_PV,
-                          UNIT_BASE_TARIFF, UNIT_BASE_GRID, UNIT_BASE_VEHICLE,
-                          UNIT_BASE_LOADPOINT, UNIT_BASE_SESSION)
-    
     key = f"{device_type}_{device_id}_{parameter}"
     
     # If mapping exists, return it
@@ -119,22 +131,9 @@ def get_device_unit(device_mapping, unit_device_mapping, device_type, device_id,
                 return default
         return default
     
-    if device_type == "site":
-        base_unit = UNIT_BASE_SITE
-    elif device_type == "battery":
-        base_unit = UNIT_BASE_BATTERY + safe_int(device_id) * 10
-    elif device_type == "pv":
-        base_unit = UNIT_BASE_PV + safe_int(device_id) * 10
-    elif device_type == "tariff":
-        base_unit = UNIT_BASE_TARIFF
-    elif device_type == "grid":
-        base_unit = UNIT_BASE_GRID
-    elif device_type == "vehicle":
-        base_unit = UNIT_BASE_VEHICLE + safe_int(device_id) * 20
-    elif device_type == "loadpoint":
-        base_unit = UNIT_BASE_LOADPOINT + safe_int(device_id) * 20
-    elif device_type == "session":
-        base_unit = UNIT_BASE_SESSION + safe_int(device_id) * 10
+    if device_type in UNIT_LAYOUT:
+        base, stride = UNIT_LAYOUT[device_type]
+        base_unit = base + safe_int(device_id) * stride if stride else base
     
     # Find the next available unit number
     unit = base_unit
@@ -151,11 +150,16 @@ def get_device_unit(device_mapping, unit_device_mapping, device_type, device_id,
     device_mapping[key] = unit
     unit_device_mapping[unit] = key
     
-    Domoticz.Debug(f"Created new device unit mapping: {key} -> Unit {unit}")
+    if debug_enabled():
+        Domoticz.Debug(f"Created new device unit mapping: {key} -> Unit {unit}")
     return unit
 
-def format_device_name(device_type, title, parameter):
-    """Format device name based on type, title and parameter"""
-    if title:
-        return f"{title} {parameter.replace('_', ' ').title()}"
-    return f"{device_type.title()} {parameter.replace('_', ' ').title()}"
\ No newline at end of file
+def reserve_unit(device_mapping, unit_device_mapping, device_type, device_id, parameter, Devices):
+    """Get or create a device unit number, returning (unit, is_new)"""
+    unit = device_mapping.get(f"{device_type}_{device_id}_{parameter}")
+    if unit is not None:
+        # Mapped devices still need creating if they were deleted from Domoticz
+        return unit, unit not in Devices
+    # A freshly allocated unit is free in Devices by construction
+    return get_device_unit(device_mapping, unit_device_mapping, device_type, device_id,
+                           parameter, True, Devices), True
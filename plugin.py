@@ -39,8 +39,8 @@ from shutil import copy2
 # Import our modules
 from api import EVCCApi
 from devices import DeviceManager
-from constants import DEFAULT_UPDATE_INTERVAL
-from helpers import update_device_value
+from constants import DEFAULT_UPDATE_INTERVAL, LOADPOINT_MODE_BY_LEVEL, LOADPOINT_PHASES_BY_LEVEL, BATTERY_MODE_BY_LEVEL
+from helpers import update_device_value, set_debug, debug_enabled
 
 class BasePlugin:
     """Main EVCC IO Plugin class"""
@@ -61,6 +61,7 @@ class BasePlugin:
         self.max_ws_retries = 3  # Maximum number of WebSocket reconnection attempts
         self.last_ws_reconnect = 0  # Track last websocket reconnection time
         self.ws_reconnect_interval = 60  # Force reconnect every 60 seconds
+        self.initial_state_timeout = 3  # Seconds to wait for the first WebSocket state at startup
         self.plugin_path = os.path.dirname(os.path.realpath(__file__))
         self.update_in_progress = False  # Flag to prevent multiple concurrent updates
         self.install_custom_page = True  # Default to installing custom page
@@ -118,6 +119,7 @@ class BasePlugin:
         
         # Set Debugging
         Domoticz.Debugging(int(Parameters["Mode6"]))
+        set_debug(int(Parameters["Mode6"]) != 0)
         
         # Initialize API client
         self.api = EVCCApi(
@@ -159,32 +161,22 @@ class BasePlugin:
             self._remove_custom_page()
 
     def _initialize_websocket(self):
-        """Initialize WebSocket connection"""
-        # First ensure any existing connection is properly closed
-        if self.api.ws_connected:
-            self.api.close_websocket()
-            # Small delay to ensure socket is fully closed
-            time.sleep(0.5)
+        """Initialize WebSocket connection (closing any existing one first)"""
+        # Connecting happens in the background; check the result on the next heartbeat
+        if not self.api.connect_websocket(keep_connection=True):
+            # No WebSocket thread is running to retry, so poll the REST API instead
+            Domoticz.Log("Failed to start WebSocket connection. Will use REST API instead.")
+            self.use_websocket = False
+            self.ws_initialized = False
+            return False
             
-        ws_connected = self.api.connect_websocket(keep_connection=True)
-        if not ws_connected:
-            if self.ws_retry_count < self.max_ws_retries:
-                self.ws_retry_count += 1
-                Domoticz.Log(f"Failed to connect to WebSocket (attempt {self.ws_retry_count}/{self.max_ws_retries}). Will retry...")
-                return False
-            else:
-                Domoticz.Log("Failed to connect to WebSocket after multiple attempts. Will use REST API instead.")
-                self.use_websocket = False
-                return False
-            
-        Domoticz.Log("WebSocket connected successfully. Will receive real-time updates.")
+        Domoticz.Log("WebSocket connection started. Will receive real-time updates once connected.")
         self.ws_initialized = True
-        self.ws_retry_count = 0  # Reset retry count on successful connection
-        self.last_ws_reconnect = time.time()  # Update the last reconnect time
+        self.last_ws_reconnect = time.monotonic()  # Update the last reconnect time
         return True
 
     def onHeartbeat(self):
-        current_time = time.time()
+        current_time = time.monotonic()
         
         # Skip this update if already in progress
         if self.update_in_progress:
@@ -206,27 +198,37 @@ class BasePlugin:
                 # Check WebSocket connection and try to reconnect if needed
                 if not self.api.ws_connected:
                     if self.ws_retry_count < self.max_ws_retries:
-                        if not self._initialize_websocket():
-                            # If reconnection fails, try again next heartbeat
-                            self.update_in_progress = False
-                            return
+                        self.ws_retry_count += 1
+                        if self.api.ws_running:
+                            # The WebSocket thread is already reconnecting with backoff
+                            Domoticz.Log(f"WebSocket not connected (attempt {self.ws_retry_count}/{self.max_ws_retries}). Waiting for reconnect...")
+                        else:
+                            Domoticz.Log(f"WebSocket not connected (attempt {self.ws_retry_count}/{self.max_ws_retries}). Reconnecting...")
+                            self._initialize_websocket()
+                        # Try again next heartbeat once the connection has had time to establish
+                        self.update_in_progress = False
+                        return
                     else:
                         # If we've exceeded retry attempts, fall back to REST API
+                        Domoticz.Log("Failed to connect to WebSocket after multiple attempts. Will use REST API instead.")
+                        # Stop the WebSocket thread, which would otherwise keep reconnecting
+                        self.api.close_websocket()
                         self.use_websocket = False
                         self.update_devices_rest()
                         self.update_in_progress = False
                         return
                     
                 # Check if we have new WebSocket data
-                if self.api.ws_connected and self.api.ws_last_data:
+                ws_data = self.api.ws_last_data if self.api.ws_connected else None
+                if ws_data:
                     # Calculate a hash of the current data to check for real changes
-                    current_hash = hash(json.dumps(self.api.ws_last_data, sort_keys=True))
+                    current_hash = hash(json.dumps(ws_data, sort_keys=True))
                     
                     # Only update if we have new data and enough time has passed
                     if ((current_hash != self.last_data_hash) and 
                         (current_time - self.last_websocket_update >= self.min_websocket_update_interval)):
                         # Update data and process changes
-                        self.last_data = self.api.ws_last_data.copy()  # Make a copy to detect future changes
+                        self.last_data = ws_data.copy()  # Make a copy to detect future changes
                         self.last_data_hash = current_hash
                         self.last_websocket_update = current_time
                         Domoticz.Debug("WebSocket data changed, updating devices")
@@ -245,11 +247,11 @@ class BasePlugin:
         """Update devices using REST API"""
         try:
             Domoticz.Debug("Updating devices using REST API")
-            state = self.api.get_state()
+            state = self.api.get_state(use_websocket=False)
             if state:
                 self.last_data = state
                 self._update_devices_from_rest_api_data(state)
-                self.last_device_update = time.time()
+                self.last_device_update = time.monotonic()
         except Exception as e:
             Domoticz.Error(f"Error updating devices via REST API: {str(e)}")
             Domoticz.Error(traceback.format_exc())
@@ -263,8 +265,9 @@ class BasePlugin:
             # Check for loadpoint structure that's common in WebSocket format
             has_loadpoint_prefix = any(key.startswith("loadpoints.") for key in self.last_data)
             
-            current_time = time.time()
-            Domoticz.Debug(f"Updating devices (last update: {int(current_time - self.last_device_update)}s ago)")
+            current_time = time.monotonic()
+            if debug_enabled():
+                Domoticz.Debug(f"Updating devices (last update: {int(current_time - self.last_device_update)}s ago)")
             self.last_device_update = current_time
                 
             if has_loadpoint_prefix:
@@ -281,7 +284,11 @@ class BasePlugin:
     def _get_initial_state(self):
         """Fetch initial state to discover devices"""
         try:
-            state = self.api.get_state()
+            # The WebSocket usually delivers the complete state right after the
+            # handshake; use it instead of an extra REST request when it is quick
+            if self.use_websocket and self.api.ws_running:
+                self.api.wait_for_state(self.initial_state_timeout)
+            state = self.api.get_state(use_websocket=self.use_websocket)
             if not state:
                 return
             
@@ -415,11 +422,17 @@ class BasePlugin:
     def _update_devices_from_websocket_data(self, data):
         """Update devices from flat WebSocket data structure"""
         try:
-            # Extract site-level data (grid, home, pv, etc.)
-            site_data = {
-                key: value for key, value in data.items() 
-                if not key.startswith(("loadpoints.", "vehicles."))
-            }
+            # Split the flat keys in one pass: site-level data (grid, home, pv, etc.)
+            # and each loadpoint's fields ("loadpoints.<index>.<field>") by index
+            site_data = {}
+            loadpoints = {}
+            for key, value in data.items():
+                if key.startswith("loadpoints."):
+                    parts = key.split(".", 2)
+                    if len(parts) == 3 and parts[1].isdigit():
+                        loadpoints.setdefault(int(parts[1]), {})[parts[2]] = value
+                elif not key.startswith("vehicles."):
+                    site_data[key] = value
             
             # Create a mapping between WebSocket flat keys and expected nested structure
             if "gridPower" not in site_data and "grid.power" in data:
@@ -450,60 +463,53 @@ class BasePlugin:
                         site_data["battery"].append(battery_data)
             
             # Log the data we're about to use for updating
-            Domoticz.Debug(f"Updating site devices with data: {json.dumps(site_data)[:200]}...")
+            if debug_enabled():
+                Domoticz.Debug(f"Updating site devices with data: {json.dumps(site_data)[:200]}...")
             
             # Update site devices including PV and battery
             if site_data:
                 self.device_manager.update_site_devices(site_data, Devices)
 
-            # Parse loadpoint data
-            loadpoint_indexes = set()
-            for key in data.keys():
-                if key.startswith("loadpoints."):
-                    parts = key.split(".")
-                    if len(parts) >= 2 and parts[1].isdigit():
-                        loadpoint_indexes.add(int(parts[1]))
+            # Fetch detailed charger status for all loadpoints in parallel
+            charger_ids = {
+                loadpoint_data["charger"] for loadpoint_data in loadpoints.values()
+                if isinstance(loadpoint_data.get("charger"), str)
+            }
+            charger_statuses = self.api.get_device_statuses("charger", charger_ids) if charger_ids else {}
             
             # Update each loadpoint's devices
-            for idx in loadpoint_indexes:
-                prefix = f"loadpoints.{idx}."
-                loadpoint_data = {
-                    key[len(prefix):]: value 
-                    for key, value in data.items() 
-                    if key.startswith(prefix)
-                }
-                
-                # Skip empty data
-                if not loadpoint_data:
-                    continue
-                    
+            for idx, loadpoint_data in sorted(loadpoints.items()):
                 # Update loadpoint with numeric ID
                 loadpoint_id = idx + 1
                 
                 # Get charger status if available
                 if "charger" in loadpoint_data and isinstance(loadpoint_data["charger"], str):
-                    charger_id = loadpoint_data["charger"]
-                    Domoticz.Debug(f"Getting detailed status for charger {charger_id}")
-                    charger_status = self.api.get_charger_status(charger_id)
+                    charger_status = charger_statuses.get(loadpoint_data["charger"])
                     if charger_status:
-                        Domoticz.Debug(f"Charger status received: {json.dumps(charger_status)}")
+                        if debug_enabled():
+                            Domoticz.Debug(f"Charger status received: {json.dumps(charger_status)}")
                         loadpoint_data.update(charger_status)
                 
                 # Map WebSocket fields to expected fields if needed
                 if "chargePower" not in loadpoint_data and "chargePower" in site_data:
                     loadpoint_data["chargePower"] = site_data["chargePower"]
                 
-                Domoticz.Debug(f"Updating loadpoint {loadpoint_id} with data: {json.dumps(loadpoint_data)[:200]}...")
+                if debug_enabled():
+                    Domoticz.Debug(f"Updating loadpoint {loadpoint_id} with data: {json.dumps(loadpoint_data)[:200]}...")
                 self.device_manager.update_loadpoint_devices(loadpoint_id, loadpoint_data, Devices)
 
             # Process vehicle data
             if "vehicles" in data and isinstance(data["vehicles"], dict):
+                # Fetch detailed status for all vehicles in parallel
+                vehicle_statuses = self.api.get_device_statuses("vehicle", [
+                    vehicle_id_str for vehicle_id_str, vehicle_data in data["vehicles"].items()
+                    if isinstance(vehicle_data, dict)
+                ])
+                
                 vehicle_index = 1
                 for vehicle_id_str, vehicle_data in data["vehicles"].items():
                     if isinstance(vehicle_data, dict):
-                        # Get detailed vehicle status
-                        Domoticz.Debug(f"Getting detailed status for vehicle {vehicle_id_str}")
-                        vehicle_status = self.api.get_vehicle_status(vehicle_id_str)
+                        vehicle_status = vehicle_statuses.get(vehicle_id_str)
                         if vehicle_status:
                             # Map charge status to selector switch values
                             if "chargeStatus" in vehicle_status:
@@ -511,15 +517,19 @@ class BasePlugin:
                                 vehicle_status["status"] = status  # Keep original status code
                             # Merge status with websocket data
                             vehicle_data.update(vehicle_status)
-                            Domoticz.Debug(f"Updated vehicle data: {json.dumps(vehicle_data)}")
+                            if debug_enabled():
+                                Domoticz.Debug(f"Updated vehicle data: {json.dumps(vehicle_data)}")
                         
-                        Domoticz.Debug(f"Updating vehicle {vehicle_index} with data: {json.dumps(vehicle_data)[:200]}...")
+                        if debug_enabled():
+                            Domoticz.Debug(f"Updating vehicle {vehicle_index} with data: {json.dumps(vehicle_data)[:200]}...")
                         self.device_manager.update_vehicle_devices(vehicle_index, vehicle_data, Devices)
                         vehicle_index += 1
 
         except Exception as e:
             Domoticz.Error(f"Error updating devices from WebSocket data: {str(e)}")
             Domoticz.Error(f"Traceback: {traceback.format_exc()}")
+        finally:
+            self.device_manager.flush(Devices)
 
     def _update_devices_from_rest_api_data(self, state):
         """Update devices from nested REST API data structure"""
@@ -551,11 +561,9 @@ class BasePlugin:
                         vehicle_id = i + 1
                         if isinstance(vehicle, dict):
                             # Get vehicle ID from DeviceID if available
-                            external_id = None
-                            for unit, device in Devices.items():
-                                if device.DeviceID and device.Description.startswith(f"vehicle_{vehicle_id}_"):
-                                    external_id = device.DeviceID
-                                    break
+                            prefix = f"vehicle_{vehicle_id}_"
+                            external_id = next((device.DeviceID for device in Devices.values()
+                                                if device.DeviceID and device.Description.startswith(prefix)), None)
                             if external_id:
                                 # Get detailed vehicle status
                                 vehicle_status = self.api.get_vehicle_status(external_id)
@@ -564,11 +572,16 @@ class BasePlugin:
                                     vehicle.update(vehicle_status)
                             self.device_manager.update_vehicle_devices(vehicle_id, vehicle, Devices)
                 elif isinstance(vehicles, dict):
+                    # Fetch detailed status for all vehicles in parallel
+                    vehicle_statuses = self.api.get_device_statuses("vehicle", [
+                        vehicle_id_str for vehicle_id_str, vehicle in vehicles.items()
+                        if isinstance(vehicle, dict)
+                    ])
+                    
                     vehicle_index = 1
                     for vehicle_id_str, vehicle in vehicles.items():
                         if isinstance(vehicle, dict):
-                            # Get detailed vehicle status
-                            vehicle_status = self.api.get_vehicle_status(vehicle_id_str)
+                            vehicle_status = vehicle_statuses.get(vehicle_id_str)
                             if vehicle_status:
                                 # Merge status with REST API data
                                 vehicle.update(vehicle_status)
@@ -578,6 +591,8 @@ class BasePlugin:
         except Exception as e:
             Domoticz.Error(f"Error updating devices from REST API data: {str(e)}")
             Domoticz.Error(traceback.format_exc())
+        finally:
+            self.device_manager.flush(Devices)
 
     def onCommand(self, Unit, Command, Level, Hue):
         """Handle commands sent to devices"""
@@ -588,6 +603,9 @@ class BasePlugin:
             Domoticz.Error(f"Unknown device unit: {Unit}")
             return
             
+        # The command changes the device value, so the next poll must write it again
+        self.device_manager.forget_last_value(Unit)
+        
         device_type = device_info["device_type"]
         device_id = device_info["device_id"]
         parameter = device_info["parameter"]
@@ -595,10 +613,7 @@ class BasePlugin:
         try:
             if device_type == "loadpoint":
                 if parameter == "mode":
-                    mode = "off"
-                    if Level == 10: mode = "now" 
-                    elif Level == 20: mode = "minpv"
-                    elif Level == 30: mode = "pv"
+                    mode = LOADPOINT_MODE_BY_LEVEL.get(Level, "off")
                     
                     # Get original ID from DeviceID if available
                     external_id = device_id
@@ -609,10 +624,7 @@ class BasePlugin:
                         update_device_value(Unit, Level, 0, Devices)
                 
                 elif parameter == "phases":
-                    phases = 0
-                    if Level == 0: phases = 0  # auto
-                    elif Level == 10: phases = 1  # 1-phase
-                    elif Level == 20: phases = 3  # 3-phase
+                    phases = LOADPOINT_PHASES_BY_LEVEL.get(Level, 0)  # unknown levels fall back to auto
                     
                     # Get original ID from DeviceID if available
                     external_id = device_id
@@ -641,11 +653,7 @@ class BasePlugin:
                         update_device_value(Unit, 0, Level, Devices)
             
             elif device_type == "battery" and parameter == "mode":
-                mode = "normal"
-                if Level == 0: mode = "unknown"
-                elif Level == 10: mode = "normal"
-                elif Level == 20: mode = "hold"
-                elif Level == 30: mode = "charge"
+                mode = BATTERY_MODE_BY_LEVEL.get(Level, "normal")
                 
                 if self.api.set_battery_mode(mode):
                     update_device_value(Unit, Level, 0, Devices)